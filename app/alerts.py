@@ -0,0 +1,212 @@
+import atexit
+import json
+import sqlite3
+import threading
+import time
+from datetime import datetime
+import requests
+import config
+import metrics
+
+# Discord accepts at most 10 embeds per webhook message
+MAX_EMBEDS_PER_MESSAGE = 10
+
+# --- EMBED BUILDER ---
+def build_embed(tender):
+    return {
+        "title": f"📢 New Tender: {tender['title']}",
+        "description": f"**Item:** {tender['items']}",
+        "url": tender['link'],
+        "color": 3066993,  # Green Color
+        "fields": [
+            {"name": "🆔 Bid Number", "value": tender['bid_no'], "inline": True},
+            {"name": "🚀 Start Date", "value": tender['start_date'], "inline": True},
+            {"name": "⏳ End Date", "value": tender['end_date'], "inline": True},
+            {"name": "🏢 Department", "value": tender['department'], "inline": False},
+            {"name": "🎯 Matched", "value": tender.get('matched_keywords') or tender['title'], "inline": False}
+        ],
+        "footer": {"text": f"Found at {datetime.now().strftime('%H:%M')}"}
+    }
+
+def queue_alerts(conn, tenders):
+    """Writes one pending_alerts row per tender on `conn`, inside the caller's transaction."""
+    now = time.time()
+    conn.executemany(
+        "INSERT INTO pending_alerts (bid_no, embed, created_at, next_attempt_at) VALUES (?, ?, ?, ?)",
+        [(t['bid_no'], json.dumps(build_embed(t)), now, now) for t in tenders]
+    )
+
+# --- BACKGROUND DISPATCHER ---
+class AlertDispatcher:
+    """
+    Delivers Discord alerts from a background thread so a slow webhook never
+    stalls the scrape. Alerts are written to the pending_alerts table in the same
+    transaction that saves their bids (storage.save_tenders, via queue_alerts); the
+    dispatcher only drains that table and deletes an alert once Discord accepts
+    it, so nothing is lost across crashes or restarts.
+    Up to 10 embeds go in one message; 429s and the rate-limit bucket headers
+    are honoured, other failures back off exponentially. A message Discord
+    rejects is split and its embeds retried one by one; an embed rejected on its
+    own is kept in the table with next_attempt_at NULL (see rejected_count) and
+    never retried.
+    """
+
+    def __init__(self, webhook_url=None, db_file=None):
+        self.webhook_url = webhook_url or config.DISCORD_WEBHOOK_URL
+        self.conn = sqlite3.connect(db_file or config.DB_FILE, check_same_thread=False, timeout=30)
+        self.lock = threading.Lock()
+        self.session = requests.Session()
+        self.wake = threading.Event()
+        self.stopping = threading.Event()
+        self.backoff = 0
+        self.thread = threading.Thread(target=self._run, name="alert-dispatcher", daemon=True)
+
+    def start(self):
+        pending = self.pending_count()
+        if pending:
+            print(f"📬 {pending} undelivered alert(s) from a previous run")
+        rejected = self.rejected_count()
+        if rejected:
+            print(f"⚠️ {rejected} alert(s) were rejected by Discord and will not be retried (see pending_alerts.last_error)")
+        self.thread.start()
+        return self
+
+    # --- producer side ---
+    def notify(self):
+        """Wakes the sender after alerts were queued (it also looks every few seconds)."""
+        self.wake.set()
+
+    def pending_count(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM pending_alerts WHERE next_attempt_at IS NOT NULL").fetchone()[0]
+
+    def rejected_count(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM pending_alerts WHERE next_attempt_at IS NULL").fetchone()[0]
+
+    # --- sender side ---
+    def _next_batch(self):
+        with self.lock:
+            return self.conn.execute(
+                "SELECT id, bid_no, embed FROM pending_alerts WHERE next_attempt_at <= ? ORDER BY id LIMIT ?",
+                (time.time(), MAX_EMBEDS_PER_MESSAGE)
+            ).fetchall()
+
+    def _delivered(self, batch):
+        with self.lock, self.conn:
+            self.conn.executemany("DELETE FROM pending_alerts WHERE id = ?", [(row[0],) for row in batch])
+
+    def _postpone(self, batch, delay, error):
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "UPDATE pending_alerts SET attempts = attempts + 1, next_attempt_at = ?, last_error = ? WHERE id = ?",
+                [(time.time() + delay, error, row[0]) for row in batch]
+            )
+
+    def _rejected(self, row, error):
+        with self.lock, self.conn:
+            self.conn.execute(
+                "UPDATE pending_alerts SET attempts = attempts + 1, next_attempt_at = NULL, last_error = ? WHERE id = ?",
+                (error, row[0])
+            )
+
+    def _send(self, batch):
+        """Posts one message. Returns seconds to wait before the next one."""
+        payload = {"embeds": [json.loads(row[2]) for row in batch]}
+        try:
+            with metrics.span("alert_post"):
+                response = self.session.post(self.webhook_url, json=payload, timeout=config.HTTP_TIMEOUT)
+        except requests.RequestException as e:
+            return self._failed(batch, f"network: {e}")
+
+        if response.status_code == 429:
+            metrics.inc("alerts_rate_limited")
+            try:
+                retry_after = float(response.json().get("retry_after", 0))
+            except ValueError:
+                retry_after = 0
+            retry_after = max(retry_after, float(response.headers.get("Retry-After", 1)))
+            print(f"⏳ Discord rate limit hit, waiting {retry_after:.1f}s")
+            return retry_after
+
+        if response.status_code >= 500 or response.status_code in (401, 403, 404):
+            # Server trouble or a broken webhook URL: nothing wrong with the alerts themselves
+            return self._failed(batch, f"HTTP {response.status_code}")
+
+        if response.status_code >= 400:
+            # Discord rejected the payload itself. Retry the embeds one per message so a
+            # single bad one can't hold back the rest; a lone rejected embed is dropped
+            error = f"HTTP {response.status_code} {response.text[:200]}"
+            metrics.inc("alerts_rejected")
+            if len(batch) == 1:
+                print(f"❌ Discord rejected the alert for {batch[0][1]}, giving up on it: {error}")
+                self._rejected(batch[0], error)
+                return 0
+            print(f"⚠️ Discord rejected a message of {len(batch)} alerts ({error}), sending them one by one")
+            for row in batch:
+                wait = self._send([row])
+                if wait:
+                    self.stopping.wait(wait)
+                if self.stopping.is_set():
+                    break
+            return 0
+
+        self._delivered(batch)
+        metrics.inc("alerts_sent", len(batch))
+        self.backoff = 0
+        print(f"✅ Alert sent for {', '.join(row[1] for row in batch)}")
+
+        # Bucket empty: wait for it to refill instead of eating a 429
+        if response.headers.get("X-RateLimit-Remaining") == "0":
+            return float(response.headers.get("X-RateLimit-Reset-After", 1))
+        return 0
+
+    def _failed(self, batch, error):
+        metrics.inc("alerts_failed", len(batch))
+        self.backoff = min(config.ALERT_MAX_BACKOFF, max(2, self.backoff * 2))
+        print(f"❌ Failed to send Discord alert ({error}), retrying in {self.backoff}s")
+        self._postpone(batch, self.backoff, error)
+        return 0
+
+    def _run(self):
+        while not self.stopping.is_set():
+            try:
+                batch = self._next_batch()
+                if not batch:
+                    # Nothing due: sleep until new alerts arrive (or a postponed one comes due)
+                    self.wake.wait(timeout=5)
+                    self.wake.clear()
+                    continue
+                wait = self._send(batch)
+            except Exception as e:
+                # Keep the thread alive (e.g. a locked database); the batch is still in the table
+                print(f"❌ Alert dispatcher error: {type(e).__name__}: {e}")
+                wait = 5
+            if wait:
+                self.stopping.wait(wait)
+
+    def stop(self, timeout=10):
+        """Gives the queue up to `timeout` seconds to drain; the rest stays in the DB."""
+        deadline = time.time() + timeout
+        while self.thread.is_alive() and time.time() < deadline and self._next_batch():
+            time.sleep(0.2)
+        self.stopping.set()
+        self.wake.set()
+        if self.thread.is_alive():
+            self.thread.join(timeout=max(0, deadline - time.time()) + 1)
+        self.session.close()
+
+_dispatcher = None
+
+def get_dispatcher(start=True):
+    """
+    The process-wide AlertDispatcher, started on first use and drained at exit.
+    With start=False it never sends: work-queue workers leave delivery to the coordinator.
+    """
+    global _dispatcher
+    if _dispatcher is None:
+        _dispatcher = AlertDispatcher()
+        if start:
+            _dispatcher.start()
+            atexit.register(_dispatcher.stop)
+    return _dispatcher
@@ -0,0 +1,98 @@
+"""
+Alert delivery check against the stand-in's Discord-style webhook (stand_in.py):
+the webhook answers 429 with Retry-After, then rejects a message holding one
+broken embed with a 400, then accepts. Checks the dispatcher waits out the rate
+limit, never sends more than 10 embeds per message, delivers every good alert
+exactly once, gives up on the broken one only, and that alerts a stopped
+dispatcher left behind are delivered by the next one.
+
+    python bench_alerts.py
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import alerts
+import create_db
+import stand_in
+
+RETRY_AFTER = 1.0
+RESET_AFTER = 0.5
+
+def tender(i, title="Roller Blinds"):
+    return {"bid_no": f"GEM/2026/B/{i}", "title": title, "items": title, "link": f"https://example.invalid/{i}",
+            "start_date": "01-01-2026", "end_date": "31-12-2099", "department": "Ministry of Culture"}
+
+def queue(db_file, dispatcher, tenders):
+    """What save_tenders does for new bids: write the alert rows, then wake the sender."""
+    conn = sqlite3.connect(db_file)
+    with conn:
+        alerts.queue_alerts(conn, tenders)
+    conn.close()
+    dispatcher.notify()
+
+def wait_for(condition, timeout=30):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.05)
+    return condition()
+
+def gap_after(log, status):
+    """Seconds between the first post answered with `status` and the post after it."""
+    for (at, answered, _), (next_at, _, _) in zip(log, log[1:]):
+        if answered == status:
+            return next_at - at
+    return None
+
+failures = []
+
+def check(name, ok, detail=""):
+    print(f"  {'✅' if ok else '❌'} {name}{f' ({detail})' if detail else ''}")
+    if not ok:
+        failures.append(name)
+
+if __name__ == "__main__":
+    site = stand_in.StandInGeM(total=0, webhook_script=[(429, {"Retry-After": str(RETRY_AFTER)})], webhook_reject="BROKEN")
+    webhook = site.start() + "/webhook"
+    with tempfile.TemporaryDirectory() as tmp:
+        db_file = os.path.join(tmp, "bench.db")
+        create_db.migrate(db_file)
+
+        print("Rate limit, then a rejected message, then 204s:")
+        good = [tender(i) for i in range(23) if i != 3]
+        dispatcher = alerts.AlertDispatcher(webhook_url=webhook, db_file=db_file).start()
+        queue(db_file, dispatcher, good[:3] + [tender(3, "BROKEN Blinds")] + good[3:])
+        wait_for(lambda: dispatcher.pending_count() == 0)
+        dispatcher.stop()
+        log = list(site.webhook_log)
+        delivered = [bid for _, status, bids in log if status == 204 for bid in bids]
+        check("waited out Retry-After", (gap_after(log, 429) or 0) >= RETRY_AFTER, f"{gap_after(log, 429):.2f}s")
+        check("at most 10 embeds per message", max(len(bids) for _, _, bids in log) <= alerts.MAX_EMBEDS_PER_MESSAGE,
+              f"largest {max(len(bids) for _, _, bids in log)}")
+        check("every good alert delivered once", sorted(delivered) == sorted(t["bid_no"] for t in good),
+              f"{len(delivered)} delivered, {len(set(delivered))} distinct")
+        check("only the broken alert given up on", dispatcher.rejected_count() == 1 and dispatcher.pending_count() == 0,
+              f"{dispatcher.rejected_count()} rejected, {dispatcher.pending_count()} pending")
+
+        print("Redelivery after a restart:")
+        site.webhook_log.clear()
+        site.webhook_script = [(500, {}), (500, {}), (204, {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset-After": str(RESET_AFTER)})]
+        later = [tender(i) for i in range(100, 115)]
+        first = alerts.AlertDispatcher(webhook_url=webhook, db_file=db_file).start()
+        queue(db_file, first, later)
+        wait_for(lambda: len(site.webhook_log) == 2)  # Both messages got a 500: everything is still queued
+        first.stop(timeout=0)
+        check("undelivered alerts kept", first.pending_count() == len(later), f"{first.pending_count()} pending")
+
+        second = alerts.AlertDispatcher(webhook_url=webhook, db_file=db_file).start()
+        wait_for(lambda: second.pending_count() == 0)
+        second.stop()
+        log = list(site.webhook_log)
+        delivered = [bid for _, status, bids in log if status == 204 for bid in bids]
+        check("delivered by the next dispatcher, once each", sorted(delivered) == sorted(t["bid_no"] for t in later),
+              f"{len(delivered)} delivered, {len(set(delivered))} distinct")
+        check("waited for an empty bucket to refill", (gap_after(log, 204) or 0) >= RESET_AFTER,
+              f"{gap_after(log, 204) or 0:.2f}s")
+    site.stop()
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,103 @@
+"""
+Attachment pipeline check against a local file server: serves fake bid PDFs
+(several bids share one document, some responses are cut off half way) and
+checks every bid ends up with a pdf_path, duplicates are stored once and cut
+downloads resume instead of starting over.
+
+    python bench_downloads.py [bids]
+"""
+import hashlib
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import config
+import create_db
+import downloads
+
+DOCUMENTS = 5          # Distinct documents; bids cycle through them
+DOC_SIZE = 512 * 1024
+CUT_EVERY = 3          # Every 3rd first request for a bid is cut off half way
+
+class FakeGeM(BaseHTTPRequestHandler):
+    documents = {}
+    requested = {}
+    ranged = 0
+    lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        bid = int(self.path.rsplit("/", 1)[-1])
+        body = self.documents[bid % DOCUMENTS]
+        with self.lock:
+            self.requested[bid] = self.requested.get(bid, 0) + 1
+            first_try = self.requested[bid] == 1
+
+        start = 0
+        range_header = self.headers.get("Range")
+        if range_header:
+            start = int(range_header.split("=")[1].split("-")[0])
+            with self.lock:
+                FakeGeM.ranged += 1
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{len(body) - 1}/{len(body)}")
+        else:
+            self.send_response(200)
+        self.send_header("Content-Type", "application/pdf")
+        self.send_header("Content-Length", str(len(body) - start))
+        self.end_headers()
+
+        if first_try and bid % CUT_EVERY == 0:
+            self.wfile.write(body[start:start + DOC_SIZE // 2])
+            self.wfile.flush()
+            self.connection.close()  # Drop the connection mid-body
+            return
+        self.wfile.write(body[start:])
+
+def build_db(path, base_url, bids):
+    create_db.migrate(path)
+    conn = sqlite3.connect(path)
+    conn.executemany(
+        "INSERT INTO tenders (bid_no, items, link, status, end_at) VALUES (?, 'Blinds', ?, 'New', '2099-01-01 00:00:00')",
+        [(f"GEM/2026/B/{i}", f"{base_url}/showbidDocument/{i}") for i in range(bids)]
+    )
+    conn.commit()
+    return conn
+
+if __name__ == "__main__":
+    bids = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+    FakeGeM.documents = {i: b"%PDF-1.4\n" + os.urandom(DOC_SIZE - 9) for i in range(DOCUMENTS)}
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeGeM)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+
+    config.DOWNLOAD_MIN_INTERVAL = 0.01
+    config.DOWNLOAD_MAX_BACKOFF = 0  # Retry cut downloads straight away
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        conn = build_db(db_path, base_url, bids)
+        root = os.path.join(tmp, "attachments")
+
+        started = time.perf_counter()
+        downloader = downloads.AttachmentDownloader(db_file=db_path, root=root, concurrency=4).start()
+        while downloader.pending_count() and time.perf_counter() - started < 60:
+            time.sleep(0.1)
+        elapsed = time.perf_counter() - started
+        downloader.stop()
+
+        paths = dict(conn.execute("SELECT bid_no, pdf_path FROM tenders").fetchall())
+        stored = [os.path.join(d, f) for d, _, files in os.walk(root) for f in files if f.endswith(".pdf")]
+        expected = {hashlib.sha256(body).hexdigest() for body in FakeGeM.documents.values()}
+        stored_hashes = {os.path.basename(p)[:-4] for p in stored}
+
+        print(f"{bids} bids in {elapsed:.2f}s ({bids * DOC_SIZE / elapsed / 1e6:.1f} MB/s)")
+        print(f"  with pdf_path:   {sum(1 for p in paths.values() if p)}/{bids}")
+        print(f"  files stored:    {len(stored)} (distinct documents: {DOCUMENTS})")
+        print(f"  hashes correct:  {stored_hashes == expected}")
+        print(f"  resumed (Range): {FakeGeM.ranged} (cut off: {len(range(0, bids, CUT_EVERY))})")
+        server.shutdown()
@@ -0,0 +1,99 @@
+"""
+End-to-end benchmark against the local GeM stand-in (stand_in.py): one backfill
+cycle plus one incremental cycle of scrape_gem per dataset size, then the
+dashboard's cold queries on the resulting database. Each size runs in a fresh
+child process so peak RSS is per run.
+
+    python bench_e2e.py [sizes...] [--latency 0.05] [--error-rate 0.02] [--backend http|browser]
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import stand_in
+
+def run_child(db_file, backend):
+    """Runs inside the child: scrape, then time the dashboard queries. Prints one JSON line."""
+    import config
+    config.DB_FILE = db_file
+    config.HISTORY_FILE = db_file + ".seen.json"  # Never exists: no legacy import
+    config.DISCORD_WEBHOOK_URL = config.GEM_BASE_URL + "/webhook"
+    config.ATTACHMENTS_DIR = os.path.join(os.path.dirname(db_file), "attachments")
+    config.METRICS_PORT = 0
+    config.KEYWORD_DELAY = 0
+    import create_db
+    import fetchers
+    import main
+    import view_cache
+
+    create_db.migrate(db_file)
+    # No browser fallback for the http run: failed keywords should show up, not be retried elsewhere
+    fetcher = fetchers.BrowserFetcher if backend == "browser" else fetchers.HttpFetcher
+    result = {}
+
+    for mode, backfill in (("backfill", True), ("incremental", False)):
+        started = time.perf_counter()
+        main.scrape_gem(fetcher(), backfill=backfill)
+        result[f"{mode}_s"] = time.perf_counter() - started
+
+    cache = view_cache.ViewCache(db_file)
+    backfill = cache.get_cycle_history().iloc[-1]  # Newest first, so the backfill is last
+    result["new_bids"] = int(backfill["new_bids"])
+    result["db_write_s"] = float(backfill.get("stage_persist", 0))
+    result["peak_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    # Dashboard: cold first page, search and header stats (fresh cache, nothing memoised)
+    started = time.perf_counter()
+    cache.get_page("Live", "", 1, 50)
+    cache.get_page("Live", "blinds", 1, 50)
+    cache.get_page("Expired", "", 1, 50)
+    cache.get_scan_stats()
+    result["dashboard_ms"] = (time.perf_counter() - started) * 1000
+
+    print("BENCH " + json.dumps(result), flush=True)
+    # Skip the atexit drains (alerts, downloads): they are not part of the measurement
+    os._exit(0)
+
+def run_size(size, args):
+    site = stand_in.StandInGeM(total=size, latency=args.latency, error_rate=args.error_rate)
+    base_url = site.start()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(os.environ, GEM_BASE_URL=base_url)
+            child = subprocess.run(
+                [sys.executable, __file__, "--child", os.path.join(tmp, "bench.db"), "--backend", args.backend],
+                env=env, capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__))
+            )
+    finally:
+        site.stop()
+    line = next((l for l in child.stdout.splitlines() if l.startswith("BENCH ")), None)
+    if line is None:
+        print(child.stdout[-2000:], child.stderr[-2000:])
+        raise SystemExit(f"benchmark child failed for {size} bids")
+    result = json.loads(line[len("BENCH "):])
+    result["requests"] = site.counts.get("search", 0)
+    result["injected_errors"] = site.counts.get("injected_error", 0)
+    return result
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("sizes", nargs="*", type=int, default=[100, 1000, 5000])
+    parser.add_argument("--latency", type=float, default=0.02, help="stand-in seconds per response")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--backend", choices=["http", "browser"], default="http")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.backend)
+
+    print(f"{'bids':>7} {'backfill':>9} {'bids/s':>8} {'increm.':>8} {'db write':>9} {'peak RSS':>9} {'dashboard':>10} {'requests':>9}")
+    for size in args.sizes:
+        r = run_size(size, args)
+        print(f"{size:>7} {r['backfill_s']:>8.2f}s {r['new_bids'] / r['backfill_s']:>8.0f} {r['incremental_s']:>7.2f}s "
+              f"{r['db_write_s'] * 1000:>7.0f}ms {r['peak_rss_mb']:>7.0f}MB {r['dashboard_ms']:>8.0f}ms "
+              f"{r['requests']:>9}" + (f" ({r['injected_errors']} errors injected)" if r['injected_errors'] else ""))
@@ -0,0 +1,52 @@
+"""
+Micro-benchmark: batched card extraction (one page.evaluate) vs the old
+per-element path (query_selector / get_attribute / inner_text per card).
+Runs against a synthetic all-bids page, no network needed.
+
+    python bench_extraction.py [cards_per_page] [rounds]
+"""
+import asyncio
+import sys
+import time
+from playwright.async_api import async_playwright
+import browser
+
+CARD_HTML = """
+<div class="card">
+  <div class="card-header">
+    <p class="bid_no pull-left">BID NO: <a class="bid_no_hover" href="/showbidDocument/{n}">GEM/2026/B/{n}</a></p>
+  </div>
+  <div class="card-body">
+    <div><strong>Items:</strong> Roller Blinds, Vertical Blinds and Curtains for Office Block {n}</div>
+    <div><strong>Quantity:</strong> 25</div>
+    <div><strong>Department Name And Address:</strong><br>Ministry of Defence<br>Department of Military Affairs</div>
+    <div><strong>Start Date:</strong> 02-01-2026 10:15 AM</div>
+    <div><strong>End Date:</strong> 12-01-2026 11:00 AM</div>
+  </div>
+</div>
+"""
+
+async def run(cards_per_page, rounds):
+    async with async_playwright() as p:
+        chromium = await browser.launch_browser(p)
+        page = await chromium.new_page()
+        await page.set_content("<html><body>" + "".join(CARD_HTML.format(n=7000000 + i) for i in range(cards_per_page)) + "</body></html>")
+
+        outputs = {}
+        for name, extract in (("per-element", browser.read_cards_per_element), ("batched", browser.read_cards)):
+            await extract(page)  # Warm up
+            started = time.perf_counter()
+            for _ in range(rounds):
+                outputs[name] = await extract(page)
+            per_page = (time.perf_counter() - started) / rounds
+            print(f"{name:12} {per_page * 1000:8.1f} ms/page  {cards_per_page / per_page:9.0f} cards/s")
+
+        await chromium.close()
+
+    same = outputs["per-element"] == outputs["batched"]
+    print(f"{'✅' if same else '❌'} Both paths return {'identical' if same else 'DIFFERENT'} cards")
+
+if __name__ == "__main__":
+    cards_per_page = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    asyncio.run(run(cards_per_page, rounds))
@@ -0,0 +1,49 @@
+"""
+Browser request routing benchmark against the local GeM stand-in: the same
+browser cycles with INTERCEPT_REQUESTS off and on, reporting what the stand-in
+actually served. The second cycle with routing on shows the warm asset cache
+(ETag revalidations instead of downloads).
+
+    python bench_interception.py [keywords] [cycles per mode]
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+import stand_in
+
+if __name__ == "__main__":
+    keyword_count = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    cycles = int(sys.argv[2]) if len(sys.argv) > 2 else 2
+
+    site = stand_in.StandInGeM(total=500)
+    os.environ["GEM_BASE_URL"] = site.start()  # Before browser.py reads config.GEM_BASE_URL
+    import config
+    import browser
+
+    config.KEYWORD_DELAY = 0
+    keywords = config.SEARCH_KEYWORDS[:keyword_count]
+    cache_dir = tempfile.mkdtemp()
+    config.ASSET_CACHE_DIR = cache_dir
+
+    print(f"{'routing':8} {'cycle':>5} {'time':>7} {'served':>10} {'requests':>9} {'304s':>5}  bids")
+    try:
+        for intercept in (False, True):
+            config.INTERCEPT_REQUESTS = intercept
+            manager = browser.BrowserManager()
+            try:
+                for cycle in range(1, cycles + 1):
+                    before = dict(site.counts)
+                    started = time.perf_counter()
+                    results, _, _ = manager.search_keywords(keywords, concurrency=2, max_pages=2)
+                    elapsed = time.perf_counter() - started
+                    served = {k: v - before.get(k, 0) for k, v in site.counts.items()}
+                    requests_made = sum(served.get(k, 0) for k in ("page", "search", "static"))
+                    print(f"{'on' if intercept else 'off':8} {cycle:>5} {elapsed:>6.2f}s {served.get('bytes', 0) / 1024:>8.0f}KB "
+                          f"{requests_made:>9} {served.get('not_modified', 0):>5}  {sum(len(c) for c in results.values())}")
+            finally:
+                manager.close()
+    finally:
+        site.stop()
+        shutil.rmtree(cache_dir, ignore_errors=True)
@@ -0,0 +1,78 @@
+"""
+Checks card_parser against the saved card corpus in fixtures/cards.json, then
+measures cards parsed per second next to the old split()-based parser. The old
+parser is faster (it does less and gets some corpus cards wrong); the numbers
+keep the parser's cost per results page in view, they are not a speedup claim.
+
+    python bench_parser.py [rounds]
+"""
+import json
+import os
+import sys
+import time
+import card_parser
+
+CORPUS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "cards.json")
+
+def legacy_parse(text):
+    """The parsing that used to be inlined in scrape_gem, for comparison only."""
+    items = "N/A"
+    if "Items:" in text:
+        parts = text.split("Items:")
+        if len(parts) > 1:
+            items = parts[1].split("Quantity:")[0].strip()
+    start_date = end_date = "N/A"
+    if "Start Date:" in text:
+        parts = text.split("Start Date:")
+        if len(parts) > 1:
+            start_date = parts[1].split("End Date:")[0].strip().replace("\n", "").strip()
+    if "End Date:" in text:
+        parts = text.split("End Date:")
+        if len(parts) > 1:
+            end_date = parts[1].split("\n")[0].strip()
+    department = "Unknown"
+    if "Department Name And Address:" in text:
+        parts = text.split("Department Name And Address:")
+        if len(parts) > 1:
+            department = parts[1].split("\n")[1].strip()
+    return items, start_date, end_date, department
+
+def check_corpus(cases):
+    failures = 0
+    for case in cases:
+        try:
+            got = card_parser.parse_card(case["card"]).to_dict()
+            ok = got == case.get("expected")
+        except card_parser.CardParseError as e:
+            got = str(e)
+            ok = got == case.get("error")
+        if not ok:
+            failures += 1
+            print(f"❌ {case['name']}: got {got!r}")
+    print(f"{'✅' if not failures else '❌'} Corpus: {len(cases) - failures}/{len(cases)} cards parsed as expected")
+    return failures
+
+def bench(name, parse, texts, rounds):
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for text in texts:
+            try:
+                parse(text)
+            except Exception:
+                pass
+    elapsed = time.perf_counter() - started
+    rate = len(texts) * rounds / elapsed
+    print(f"{name:8} {rate:12,.0f} cards/s  ({1e6 / rate:.1f} µs/card)")
+    return rate
+
+if __name__ == "__main__":
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    with open(CORPUS_FILE) as f:
+        cases = json.load(f)
+
+    failures = check_corpus(cases)
+    texts = [case["card"]["text"] for case in cases if "text" in case["card"]]
+    legacy = bench("legacy", legacy_parse, texts, rounds)
+    parser = bench("parser", card_parser.parse_text, texts, rounds)
+    print(f"legacy / parser throughput: {legacy / parser:.1f}x")
+    sys.exit(1 if failures else 0)
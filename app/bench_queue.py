@@ -0,0 +1,100 @@
+"""
+Work-queue benchmark against the local GeM stand-in (stand_in.py): a backfill of
+every site query split into keyword/page tasks, run by 1, 2, 4... worker
+processes sharing one database. --kill-one SIGKILLs a worker mid-run to check
+that its leased task is reclaimed and nothing is saved or alerted twice.
+
+    python bench_queue.py [worker counts...] [--bids 2000] [--latency 0.05] [--kill-one]
+"""
+import argparse
+import os
+import signal
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import stand_in
+
+LEASE_SECONDS = 3  # Short, so a killed worker's task comes back quickly
+
+def run_child(db_file):
+    """Runs inside a worker process until the queue is empty."""
+    import config
+    config.DB_FILE = db_file
+    config.HISTORY_FILE = db_file + ".seen.json"  # Never exists: no legacy import
+    config.KEYWORD_DELAY = 0
+    config.QUEUE_LEASE_SECONDS = LEASE_SECONDS
+    config.QUEUE_HEARTBEAT_INTERVAL = 1
+    config.QUEUE_POLL_INTERVAL = 0.2
+    import main
+    main.run_worker(exit_when_idle=True)
+    # Skip the atexit drains: queued alerts are counted, not delivered
+    os._exit(0)
+
+def run(workers, args, base_url):
+    import config
+    import create_db
+    import matcher
+    import work_queue
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_file = os.path.join(tmp, "bench.db")
+        create_db.migrate(db_file)
+        queue = work_queue.SqliteTaskQueue(db_file)
+        queries = matcher.site_queries(config.SEARCH_KEYWORDS)
+        for keyword in queries:
+            queue.enqueue(keyword, backfill=True)
+
+        env = dict(os.environ, GEM_BASE_URL=base_url)
+        started = time.perf_counter()
+        children = [
+            subprocess.Popen([sys.executable, __file__, "--child", db_file], env=env, cwd=os.path.dirname(os.path.abspath(__file__)),
+                             stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            for _ in range(workers)
+        ]
+        if args.kill_one:
+            time.sleep(1.5)
+            children[0].send_signal(signal.SIGKILL)
+        for child in children:
+            child.wait()
+        elapsed = time.perf_counter() - started
+
+        conn = sqlite3.connect(db_file)
+        result = {
+            "elapsed": elapsed,
+            "tasks": conn.execute("SELECT COUNT(*) FROM crawl_tasks WHERE status = 'done'").fetchone()[0],
+            "open": conn.execute("SELECT COUNT(*) FROM crawl_tasks WHERE status IN ('pending', 'leased')").fetchone()[0],
+            "reclaimed": conn.execute("SELECT COUNT(*) FROM crawl_tasks WHERE attempts > 1").fetchone()[0],
+            "bids": conn.execute("SELECT COUNT(*) FROM tenders").fetchone()[0],
+            "alerts": conn.execute("SELECT COUNT(*) FROM pending_alerts").fetchone()[0],
+            "alerted_bids": conn.execute("SELECT COUNT(DISTINCT bid_no) FROM pending_alerts").fetchone()[0],
+        }
+        conn.close()
+        queue.close()
+    return result
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("workers", nargs="*", type=int, default=[1, 2, 4])
+    parser.add_argument("--bids", type=int, default=2000, help="stand-in dataset size")
+    parser.add_argument("--latency", type=float, default=0.05, help="stand-in seconds per response")
+    parser.add_argument("--kill-one", action="store_true", help="SIGKILL the first worker after 1.5s")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child)
+
+    site = stand_in.StandInGeM(total=args.bids, latency=args.latency)
+    base_url = site.start()
+    try:
+        print(f"{'workers':>7} {'time':>8} {'speedup':>8} {'pages':>6} {'bids':>6} {'alerts':>7} {'duplicates':>11} {'reclaimed':>10} {'open':>5}")
+        baseline = None
+        for workers in args.workers:
+            r = run(workers, args, base_url)
+            baseline = baseline or r["elapsed"]  # Speedup relative to the first worker count
+            print(f"{workers:>7} {r['elapsed']:>7.2f}s {baseline / r['elapsed']:>7.1f}x {r['tasks']:>6} "
+                  f"{r['bids']:>6} {r['alerts']:>7} {r['alerts'] - r['alerted_bids']:>11} {r['reclaimed']:>10} {r['open']:>5}")
+    finally:
+        site.stop()
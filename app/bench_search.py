@@ -0,0 +1,72 @@
+"""
+Search benchmark: the old pandas path (load every row, three str.contains scans)
+vs the FTS5 index used by queries.py, on a synthetic tenders table.
+
+    python bench_search.py [rows]
+"""
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+import pandas as pd
+import create_db
+import queries
+
+ITEMS = ["Roller Blinds", "Vertical Blinds", "Window Curtains", "Vinyl Sticker", "Name Plate", "Reflector",
+         "Lamination Film", "Netlon Mesh", "LED Board", "Neon Sign", "Office Chair", "Printer Cartridge",
+         "Desktop Computer", "Steel Almirah", "Water Cooler", "Hand Sanitizer", "Bed Sheet", "Fire Extinguisher"]
+DEPARTMENTS = ["Ministry of Defence", "Ministry of Railways", "Ministry of Home Affairs", "Ministry of Education",
+               "Ministry of Health and Family Welfare", "State Government of Kerala", "Ministry of Culture"]
+KEYWORDS = ["blinds", "curtains", "vinyl", "sticker", "name plate", "reflector", "led board", "neon sign"]
+SEARCHES = ["blinds", "neon sign", "railways", "GEM/2026/B/70001", '"name plate"']
+
+def build_db(path, rows):
+    create_db.migrate(path)
+    conn = sqlite3.connect(path)
+    random.seed(7)
+    batch = []
+    for i in range(rows):
+        items = ", ".join(random.sample(ITEMS, random.randint(1, 3)))
+        end_at = f"2026-{random.randint(1, 12):02d}-{random.randint(1, 28):02d} 11:00:00"
+        batch.append((
+            f"GEM/2026/B/{7000000 + i}", random.choice(KEYWORDS), items, random.choice(DEPARTMENTS),
+            "01-01-2026 10:00 AM", "12-01-2026 11:00 AM", "", random.choice(["New"] * 8 + ["Bookmarked", "Ignored"]),
+            f"2026-01-{random.randint(1, 28):02d} {random.randint(0, 23):02d}:00:00", end_at
+        ))
+    conn.executemany('''
+        INSERT INTO tenders (bid_no, title, items, department, start_date, end_date, link, status, found_at, end_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', batch)
+    conn.commit()
+    return conn
+
+def pandas_search(conn, search):
+    """What render_tab_content used to do for one tab."""
+    df = pd.read_sql("SELECT * FROM tenders ORDER BY found_at DESC", conn)
+    return df[df['items'].str.contains(search, case=False, na=False) |
+              df['department'].str.contains(search, case=False, na=False) |
+              df['title'].str.contains(search, case=False, na=False)]
+
+def fts_search(conn, search):
+    return queries.count_tab(conn, "Live", search), queries.fetch_tab(conn, "Live", search, limit=50)
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, (time.perf_counter() - started) * 1000
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        print(f"Building {rows:,} synthetic tenders...")
+        conn = build_db(path, rows)
+
+        print(f"{'search':22} {'pandas':>10} {'fts5':>10}  matches (pandas / fts live)")
+        for search in SEARCHES:
+            matched, pandas_ms = timed(pandas_search, conn, search.strip('"'))
+            (total, _), fts_ms = timed(fts_search, conn, search)
+            print(f"{search:22} {pandas_ms:8.0f}ms {fts_ms:8.0f}ms  {len(matched):,} / {total:,}")
+        conn.close()
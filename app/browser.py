@@ -0,0 +1,416 @@
+import asyncio
+import atexit
+import os
+import time
+from playwright.async_api import async_playwright
+import config
+import interception
+import metrics
+
+TARGET_URL = config.GEM_BASE_URL + "/all-bids"
+SEARCH_INPUT = 'input[type="search"]'
+
+# "Next page" link of the result list pagination
+NEXT_PAGE = "#light-pagination a.next, a.page-link.next"
+
+# XHR that feeds the result list after a search
+RESULTS_ENDPOINT = "/all-bids-data"
+
+# Seconds to let the cards re-render once the results response has arrived
+RENDER_SETTLE = 2
+
+# Why a keyword's paging stopped: it reached bids we already have, the results ran out,
+# or it used up its max_pages (there may be unseen bids left)
+STOP_CAUGHT_UP = "caught up"
+STOP_END = "end of results"
+STOP_PAGE_CAP = "page cap"
+
+# Cheap fingerprint of the result list: card count plus first and last card text
+CARD_SIGNATURE_JS = """() => {
+    const cards = document.querySelectorAll('.card');
+    if (!cards.length) return '0';
+    return cards.length + '|' + cards[0].innerText.slice(0, 200) + '|' + cards[cards.length - 1].innerText.slice(0, 200);
+}"""
+
+# --- BROWSER SETUP ---
+async def launch_browser(p):
+    """Starts the one stealth Chromium shared by every search worker."""
+    return await p.chromium.launch(
+        headless=True,
+        args=[
+            "--disable-blink-features=AutomationControlled", # Hides "I am a robot" flag
+            "--no-sandbox",
+            "--disable-setuid-sandbox"
+        ]
+    )
+
+async def new_stealth_context(browser):
+    """Creates a context that mimics a real user (each worker gets its own cookies)."""
+    context = await browser.new_context(
+        user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+        viewport={"width": 1920, "height": 1080},
+        ignore_https_errors=True
+    )
+
+    # Javascript injection to hide WebDriver property
+    await context.add_init_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+    return context
+
+# --- PAGE ACTIONS ---
+async def open_bid_list(page):
+    """Loads the public bid list and waits for the first cards."""
+    with metrics.span("navigate"):
+        # High timeout for slow government servers
+        await page.goto(TARGET_URL, timeout=60000, wait_until="domcontentloaded")
+        await page.wait_for_selector(".card-body", timeout=20000)
+
+async def card_signature(page):
+    return await page.evaluate(CARD_SIGNATURE_JS)
+
+def _is_results_response(response):
+    return RESULTS_ENDPOINT in response.url and response.request.method == "POST"
+
+async def _warn_if_unrendered(page, response):
+    """Warns when the results response listed bids but no cards are on screen."""
+    try:
+        total = (await response.json())["response"]["response"]["numFound"]
+    except Exception:
+        return  # Not the JSON we know; nothing to compare against
+    if total and await card_signature(page) == "0":
+        metrics.inc("empty_result_pages")
+        print(f"⚠️ Results response listed {total} bid(s) but no cards rendered within {RENDER_SETTLE}s")
+
+async def wait_for_results(page, before, submit):
+    """
+    Runs submit() and returns once the result list has been refreshed.
+    Finishes as soon as the cards change to a non-empty list (the list is cleared while
+    the site loads, which is not a result yet); if the results response arrives but the
+    cards stay identical or empty, it gives the DOM RENDER_SETTLE seconds and warns if
+    the response had bids the page never showed.
+    Raises TimeoutError instead of letting the caller read the previous keyword's cards.
+    """
+    timeout_ms = config.SEARCH_TIMEOUT * 1000
+    response_wait = asyncio.ensure_future(
+        page.wait_for_event("response", predicate=_is_results_response, timeout=timeout_ms)
+    )
+    await submit()
+    dom_wait = asyncio.ensure_future(
+        page.wait_for_function(
+            f"(before) => {{ const now = ({CARD_SIGNATURE_JS})(); return now !== before && now !== '0'; }}",
+            arg=before, timeout=timeout_ms
+        )
+    )
+
+    try:
+        done, _ = await asyncio.wait({response_wait, dom_wait}, return_when=asyncio.FIRST_COMPLETED)
+        if dom_wait in done and dom_wait.exception() is None:
+            return
+
+        if response_wait in done and response_wait.exception() is None:
+            try:
+                await asyncio.wait_for(asyncio.shield(dom_wait), RENDER_SETTLE)
+            except Exception:
+                # Results came back unchanged, empty, or slower to render than expected
+                await _warn_if_unrendered(page, response_wait.result())
+            return
+
+        # Whichever finished first failed, give the other one the rest of the timeout
+        await asyncio.wait({response_wait, dom_wait})
+        if dom_wait.exception() is None:
+            return
+        if response_wait.exception() is None:
+            await _warn_if_unrendered(page, response_wait.result())
+            return
+        raise TimeoutError(f"results did not refresh within {config.SEARCH_TIMEOUT}s")
+    finally:
+        for waiter in (response_wait, dom_wait):
+            if not waiter.done():
+                waiter.cancel()
+            else:
+                waiter.exception()  # Mark as retrieved so asyncio doesn't log it
+
+async def search_keyword(page, keyword):
+    """Types a keyword into the site search and waits until its results are on screen."""
+    await page.wait_for_selector(SEARCH_INPUT, state="visible", timeout=5000)
+    await page.fill(SEARCH_INPUT, "")
+    await page.fill(SEARCH_INPUT, keyword)
+
+    before = await card_signature(page)
+    await wait_for_results(page, before, lambda: page.press(SEARCH_INPUT, "Enter"))
+
+async def next_page(page):
+    """Clicks through to the next result page. Returns False on the last page."""
+    link = await page.query_selector(NEXT_PAGE)
+    if link is None or await link.get_attribute("aria-disabled") == "true":
+        return False
+    before = await card_signature(page)
+    await wait_for_results(page, before, link.click)
+    return True
+
+async def crawl_pages(page, keyword, max_pages, stop_check=None):
+    """
+    Reads the current result page and keeps paging until max_pages, the last page,
+    or stop_check(keyword, cards_on_page) says we've reached bids we already know.
+    Returns (cards, STOP_* reason).
+    """
+    cards = []
+    for page_no in range(1, max_pages + 1):
+        if page_no > 1:
+            # Polite pause between pages too
+            await asyncio.sleep(config.KEYWORD_DELAY)
+            if not await next_page(page):
+                return cards, STOP_END
+        page_cards = await read_cards(page)
+        cards.extend(page_cards)
+        if not page_cards:
+            return cards, STOP_END
+        if stop_check and stop_check(keyword, page_cards):
+            return cards, STOP_CAUGHT_UP
+    return cards, STOP_PAGE_CAP
+
+# Pulls text and bid link for every card in one round-trip
+EXTRACT_CARDS_JS = """() => Array.from(document.querySelectorAll('.card')).map(card => {
+    const link = card.querySelector("a[href*='/showbidDocument']");
+    return {
+        text: card.innerText,
+        href: link ? link.getAttribute('href') : null,
+        linkText: link ? link.innerText : null
+    };
+})"""
+
+async def read_cards(page):
+    """Copies every visible card into plain dicts with a single page.evaluate call."""
+    cards = []
+    with metrics.span("extract"):
+        raw_cards = await page.evaluate(EXTRACT_CARDS_JS)
+    for raw in raw_cards:
+        bid_no = "Unknown"
+        link = TARGET_URL
+
+        # Link usually contains 'showbidDocument'
+        if raw["href"]:
+            link = config.GEM_BASE_URL + raw["href"]
+            bid_no = (raw["linkText"] or "").strip()
+
+        cards.append({"bid_no": bid_no, "link": link, "text": raw["text"]})
+    return cards
+
+async def read_cards_per_element(page):
+    """The old extraction path (four IPC calls per card), kept for bench_extraction.py."""
+    cards = []
+    for card in await page.query_selector_all(".card"):
+        try:
+            bid_no = "Unknown"
+            link = TARGET_URL
+
+            # Find link (usually contains 'showbidDocument')
+            link_elem = await card.query_selector("a[href*='/showbidDocument']")
+            if link_elem:
+                link = config.GEM_BASE_URL + await link_elem.get_attribute("href")
+                bid_no = (await link_elem.inner_text()).strip()
+
+            cards.append({"bid_no": bid_no, "link": link, "text": await card.inner_text()})
+        except Exception:
+            continue
+    return cards
+
+# --- WORKER POOL ---
+async def _search_worker(worker_id, browser, queue, results, timings, stops, max_pages, stop_check, asset_cache=None, stats=None):
+    context = await new_stealth_context(browser)
+    if asset_cache is not None:
+        await interception.install(context, asset_cache, stats)
+    page = await context.new_page()
+    try:
+        await open_bid_list(page)
+
+        while True:
+            try:
+                keyword = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+
+            print(f"🔍 [w{worker_id}] Searching for: {keyword}")
+            started = time.perf_counter()
+            try:
+                await search_keyword(page, keyword)
+                results[keyword], stops[keyword] = await crawl_pages(page, keyword, max_pages, stop_check)
+            except Exception as e:
+                metrics.inc("search_errors", backend="browser")
+                print(f"⚠️ Search skipped for '{keyword}': {e}")
+            timings[keyword] = time.perf_counter() - started
+            metrics.observe("search", timings[keyword], keyword=keyword, backend="browser")
+
+            # Polite pause between this worker's keywords
+            await asyncio.sleep(config.KEYWORD_DELAY)
+    finally:
+        await context.close()
+
+# --- LONG-LIVED BROWSER ---
+def _process_tree_rss_mb(root_pid):
+    """RSS of every process below root_pid (the Playwright driver and its Chromium), Linux only."""
+    children = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+            children.setdefault(ppid, []).append(int(entry))
+        except (OSError, ValueError, IndexError):
+            continue
+
+    total_kb = 0
+    pending = list(children.get(root_pid, []))
+    while pending:
+        pid = pending.pop()
+        pending.extend(children.get(pid, []))
+        try:
+            with open(f"/proc/{pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total_kb += int(line.split()[1])
+                        break
+        except OSError:
+            continue
+    return total_kb / 1024
+
+class BrowserManager:
+    """
+    Keeps one Chromium (and the event loop it lives on) alive across scrape cycles.
+    Before each cycle it health-checks the browser and relaunches it if it crashed,
+    grew past BROWSER_MAX_MEMORY_MB or has served BROWSER_RECYCLE_CYCLES cycles.
+    """
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.playwright = None
+        self.browser = None
+        self.cycles = 0
+        self.asset_cache = interception.AssetCache() if config.INTERCEPT_REQUESTS else None
+
+    # --- lifecycle ---
+    async def _start(self):
+        started = time.perf_counter()
+        if self.playwright is None:
+            self.playwright = await async_playwright().start()
+        self.browser = await launch_browser(self.playwright)
+        self.cycles = 0
+        metrics.observe("browser_launch", time.perf_counter() - started)
+        print(f"🚀 Browser launched in {time.perf_counter() - started:.1f}s")
+
+    async def _stop(self):
+        if self.browser is not None:
+            try:
+                await self.browser.close()
+            except Exception:
+                pass  # Already dead
+            self.browser = None
+
+    def memory_mb(self):
+        if not os.path.isdir("/proc"):
+            return 0
+        return _process_tree_rss_mb(os.getpid())
+
+    async def _health_problem(self):
+        """Returns why the browser should be relaunched, or None if it is fine."""
+        if not self.browser.is_connected():
+            return "browser disconnected"
+        if self.cycles >= config.BROWSER_RECYCLE_CYCLES:
+            return f"recycling after {self.cycles} cycles"
+        memory = self.memory_mb()
+        if memory > config.BROWSER_MAX_MEMORY_MB:
+            return f"memory at {memory:.0f} MB"
+        try:
+            # Cheapest real round-trip: open and close an empty context
+            context = await asyncio.wait_for(self.browser.new_context(), 10)
+            await context.close()
+        except Exception as e:
+            return f"health check failed ({e})"
+        return None
+
+    async def _ensure_browser(self):
+        if self.browser is not None:
+            problem = await self._health_problem()
+            if problem:
+                print(f"♻️ Relaunching browser: {problem}")
+                metrics.inc("browser_relaunches")
+                await self._stop()
+        if self.browser is None:
+            await self._start()
+        return self.browser
+
+    # --- scraping ---
+    async def _search_all(self, keywords, concurrency, max_pages, stop_check, retry_on_crash=True):
+        queue = asyncio.Queue()
+        for keyword in keywords:
+            queue.put_nowait(keyword)
+
+        results, timings, stops = {}, {}, {}
+        stats = interception.RequestStats()
+        browser = await self._ensure_browser()
+        print(f"🌍 Navigating to {TARGET_URL} with {concurrency} worker(s)...")
+        outcomes = await asyncio.gather(
+            *(_search_worker(i + 1, browser, queue, results, timings, stops, max_pages, stop_check, self.asset_cache, stats)
+              for i in range(concurrency)),
+            return_exceptions=True
+        )
+        if self.asset_cache is not None:
+            print(stats.summary())
+        for worker_id, outcome in enumerate(outcomes, start=1):
+            if isinstance(outcome, Exception):
+                print(f"❌ Worker w{worker_id} stopped: {outcome}")
+        self.cycles += 1
+
+        # The browser died mid-cycle: relaunch once and retry whatever was lost
+        missing = [k for k in keywords if k not in results]
+        if retry_on_crash and missing and not browser.is_connected():
+            print(f"💥 Browser crashed, retrying {len(missing)} keyword(s) on a fresh one")
+            await self._stop()
+            retry_results, retry_timings, retry_stops = await self._search_all(
+                missing, min(concurrency, len(missing)), max_pages, stop_check, retry_on_crash=False
+            )
+            results.update(retry_results)
+            timings.update(retry_timings)
+            stops.update(retry_stops)
+        return results, timings, stops
+
+    def search_keywords(self, keywords, concurrency, max_pages=1, stop_check=None):
+        return self.loop.run_until_complete(self._search_all(keywords, concurrency, max_pages, stop_check))
+
+    def close(self):
+        async def _shutdown():
+            await self._stop()
+            if self.playwright is not None:
+                await self.playwright.stop()
+                self.playwright = None
+        if not self.loop.is_closed():
+            self.loop.run_until_complete(_shutdown())
+            self.loop.close()
+
+_manager = None
+
+def get_manager():
+    """The process-wide BrowserManager, created on first use and closed at exit."""
+    global _manager
+    if _manager is None:
+        _manager = BrowserManager()
+        atexit.register(_manager.close)
+    return _manager
+
+def search_keywords(keywords, concurrency=None, max_pages=1, stop_check=None):
+    """
+    Runs every keyword search through a bounded pool of pages in the shared browser,
+    paging through up to max_pages result pages per keyword (see crawl_pages).
+    Returns ({keyword: [card, ...]}, {keyword: seconds}, {keyword: STOP_* reason}).
+    """
+    concurrency = max(1, min(concurrency or config.SCRAPE_CONCURRENCY, len(keywords) or 1))
+    return get_manager().search_keywords(keywords, concurrency, max_pages, stop_check)
+
+def print_timings(timings):
+    """Per-keyword timing report, slowest first, to help pick SCRAPE_CONCURRENCY."""
+    if not timings:
+        return
+    print("⏱️ Keyword timings:")
+    for keyword, seconds in sorted(timings.items(), key=lambda kv: kv[1], reverse=True):
+        print(f"   {seconds:6.1f}s  {keyword}")
+    print(f"   total search time {sum(timings.values()):.1f}s across {len(timings)} keyword(s)")
@@ -0,0 +1,91 @@
+import re
+from dataclasses import dataclass, asdict
+from datetime import datetime
+
+# Every label we care about; a field runs from its label to the next one
+LABEL_RE = re.compile(r"(BID NO|RA NO|Items|Quantity|Department Name And Address|Start Date|End Date)\s*:")
+BID_NO_RE = re.compile(r"GEM/\d{4}/[A-Z]/\d+")
+
+# How GeM cards print dates, most common first
+DATE_FORMATS = ("%d-%m-%Y %I:%M %p", "%d-%m-%Y %H:%M", "%d-%m-%Y")
+
+class CardParseError(Exception):
+    """Raised when a card has no usable bid number or none of the expected fields."""
+
+@dataclass
+class CardRecord:
+    bid_no: str
+    link: str
+    items: str = "N/A"
+    start_date: str = "N/A"
+    end_date: str = "N/A"
+    department: str = "Unknown"
+
+    def to_dict(self):
+        return asdict(self)
+
+def _squash(value):
+    """Collapses newlines and runs of spaces into single spaces."""
+    return " ".join(value.split())
+
+def split_sections(text):
+    """{label: text up to the next label}, first occurrence of each label wins."""
+    parts = LABEL_RE.split(text)
+    sections = {}
+    for label, value in zip(parts[1::2], parts[2::2]):
+        # First occurrence wins, same as the old split()-based parser
+        sections.setdefault(label, value)
+    return sections
+
+def parse_text(text, bid_no="Unknown", link=""):
+    """Parses the innerText of one GeM card into a CardRecord."""
+    sections = split_sections(text)
+    if not sections:
+        raise CardParseError("no known labels in card text")
+
+    if bid_no in ("", "Unknown"):
+        # Fallback: link was hidden, take the id from the text
+        match = BID_NO_RE.search(sections.get("BID NO", "")) or BID_NO_RE.search(text)
+        if not match:
+            raise CardParseError("no bid number")
+        bid_no = match.group(0)
+
+    record = CardRecord(bid_no=bid_no, link=link)
+    if "Items" in sections:
+        record.items = _squash(sections["Items"]) or record.items
+    if "Start Date" in sections:
+        record.start_date = _squash(sections["Start Date"]) or record.start_date
+    if "End Date" in sections:
+        lines = sections["End Date"].strip().splitlines()
+        record.end_date = lines[0].strip() if lines else record.end_date
+    if "Department Name And Address" in sections:
+        lines = [line.strip() for line in sections["Department Name And Address"].splitlines() if line.strip()]
+        record.department = lines[0] if lines else record.department
+    return record
+
+def parse_card(card):
+    """
+    Parses a raw card from any fetch backend. Backends that already return
+    structured data put it under "fields"; everything else is card text.
+    """
+    fields = card.get("fields")
+    if fields is not None:
+        if card["bid_no"] in ("", "Unknown"):
+            raise CardParseError("no bid number")
+        return CardRecord(bid_no=card["bid_no"], link=card["link"], **fields)
+    return parse_text(card["text"], card["bid_no"], card["link"])
+
+def parse_date(value):
+    """'12-01-2026 11:00 AM' -> datetime, or None for 'N/A' and anything unreadable."""
+    value = " ".join((value or "").split())
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    return None
+
+def to_iso(value):
+    """Display date -> sortable 'YYYY-MM-DD HH:MM:SS' for the start_at/end_at columns."""
+    parsed = parse_date(value)
+    return parsed.strftime('%Y-%m-%d %H:%M:%S') if parsed else None
@@ -0,0 +1,199 @@
+import os
+import re
+import sqlite3
+import time
+from datetime import datetime, timedelta
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+import config
+import create_db
+import queries
+
+# --- COLD STORAGE ---
+# compact() moves tenders that expired more than COLD_AFTER_DAYS ago (bookmarked ones
+# stay) out of tenders.db into Parquet, one folder per expiry month:
+#   COLD_DIR/end_month=2026-01/<timestamp>-<pid>.parquet
+# The cold_files table is the manifest. A file only exists for readers once the
+# transaction that records it and deletes its rows from tenders has committed, so a
+# crash leaves the rows either hot or cold, never both. Archived bid numbers go into
+# legacy_seen_bids, so the scraper still treats them as seen.
+# Readers plan from the manifest: counts and months come from SQLite, only the months
+# a page needs are opened and only the columns it shows are read.
+
+SQL_TYPES = {"TEXT": pa.string(), "INTEGER": pa.int64(), "REAL": pa.float64()}
+ORPHAN_AGE = 3600  # Unrecorded files older than this (seconds) are leftovers of a crashed compaction
+
+def _schema(conn):
+    """Arrow schema of the tenders table, so every file has the same column types."""
+    return pa.schema([(name, SQL_TYPES.get(kind.upper(), pa.string())) for _, name, kind, *_ in conn.execute("PRAGMA table_info(tenders)")])
+
+def _remove_orphans(conn, root):
+    recorded = {row[0] for row in conn.execute("SELECT path FROM cold_files")}
+    for folder, _, files in os.walk(root):
+        for name in files:
+            path = os.path.join(folder, name)
+            if os.path.relpath(path, root) not in recorded and time.time() - os.path.getmtime(path) > ORPHAN_AGE:
+                os.remove(path)
+
+def compact(db_file=None, root=None, now=None):
+    """Moves tenders expired before the cutoff into the cold tier. Returns how many were moved."""
+    root = root or config.COLD_DIR
+    now = now or datetime.now()
+    cutoff = (now - timedelta(days=config.COLD_AFTER_DAYS)).strftime('%Y-%m-%d %H:%M:%S')
+    conn = sqlite3.connect(db_file or config.DB_FILE, isolation_level=None, timeout=30)
+    written = []
+    try:
+        _remove_orphans(conn, root)
+        # Write lock for the whole move: nobody changes these rows while their files are written
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            schema = _schema(conn)
+            df = pd.read_sql("SELECT * FROM tenders WHERE end_at < ? AND status != 'Bookmarked'", conn, params=[cutoff])
+            if df.empty:
+                conn.execute("ROLLBACK")
+                return 0
+
+            stamp = f"{now.strftime('%Y%m%d%H%M%S')}-{os.getpid()}"
+            manifest = []
+            for month, part in df.groupby(df["end_at"].str[:7]):
+                relative = os.path.join(f"end_month={month}", f"{stamp}.parquet")
+                path = os.path.join(root, relative)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                part = part.sort_values(["end_at", "bid_no"], ascending=False)
+                pq.write_table(pa.Table.from_pandas(part, schema=schema, preserve_index=False), path + ".tmp")
+                os.replace(path + ".tmp", path)
+                written.append(path)
+                manifest.append((relative, month, len(part), part["end_at"].min(), part["end_at"].max(), now.strftime('%Y-%m-%d %H:%M:%S')))
+
+            bid_nos = [(b,) for b in df["bid_no"]]
+            conn.executemany(
+                "INSERT INTO cold_files (path, month, rows, min_end_at, max_end_at, created_at) VALUES (?, ?, ?, ?, ?, ?)", manifest
+            )
+            conn.executemany("INSERT OR IGNORE INTO legacy_seen_bids (bid_no) VALUES (?)", bid_nos)
+            conn.executemany("DELETE FROM tenders WHERE bid_no = ?", bid_nos)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            for path in written:
+                os.remove(path)
+            raise
+        return len(df)
+    finally:
+        conn.close()
+
+_last_compaction = 0
+
+def compact_if_due():
+    """Runs compact() once every COMPACT_EVERY_HOURS (called from the scraper's loop)."""
+    global _last_compaction
+    if time.time() - _last_compaction < config.COMPACT_EVERY_HOURS * 3600:
+        return
+    _last_compaction = time.time()
+    try:
+        moved = compact()
+    except (OSError, sqlite3.Error, pa.ArrowException) as e:
+        print(f"⚠️ Cold storage compaction failed: {e}")
+        return
+    if moved:
+        print(f"🧊 Moved {moved} expired tender(s) to cold storage")
+
+# --- READS ---
+class ColdTier:
+    """Read side for the dashboard, planned from the manifest in the caller's connection."""
+
+    def __init__(self, conn, root=None):
+        self.conn = conn
+        self.root = root or config.COLD_DIR
+        self.hits = {}  # search -> matching (bid_no, end_at, month), newest first
+
+    def clear(self):
+        self.hits.clear()
+
+    def months(self, since=None):
+        """[(month, [paths], rows)], newest month first, optionally only from `since` (YYYY-MM) on."""
+        try:
+            rows = self.conn.execute(
+                "SELECT month, path, rows FROM cold_files WHERE month >= ? ORDER BY month DESC", (since or "",)
+            ).fetchall()
+        except sqlite3.OperationalError:
+            return []  # Database older than migration 10
+        months = {}
+        for month, path, count in rows:
+            paths, total = months.get(month, ([], 0))
+            months[month] = (paths + [path], total + count)
+        return [(month, paths, total) for month, (paths, total) in months.items()]
+
+    def _dataset(self, paths):
+        files = [os.path.join(self.root, p) for p in paths]
+        # The newest file has the newest columns; older files get nulls for what they lack
+        schema = pq.read_schema(max(files, key=os.path.getmtime))
+        return ds.dataset(files, format="parquet", schema=schema)
+
+    def read(self, paths, columns=None, filter=None):
+        """Reads only `columns` of the given files (relative paths) as a DataFrame."""
+        if not paths:
+            return pd.DataFrame(columns=columns or [])
+        return self._dataset(paths).to_table(columns=columns, filter=filter).to_pandas()
+
+    def _search_hits(self, search):
+        if search not in self.hits:
+            paths = [p for _, month_paths, _ in self.months() for p in month_paths]
+            if not paths:
+                return pd.DataFrame(columns=["bid_no", "end_at", "month"])
+            table = self._dataset(paths).to_table(columns=list(queries.SEARCH_COLUMNS) + ["end_at"])
+            # Same reading of the search box as the FTS query: every term required, each one
+            # starting at a word; prefix terms may run on, "quoted" ones must end at a word
+            # boundary too. Columns are joined with "|" so a phrase can't span two of them
+            text = pc.binary_join_element_wise(*[
+                pc.replace_substring_regex(pc.utf8_lower(pc.fill_null(table[c], "")), r"\W+", " ")
+                for c in queries.SEARCH_COLUMNS
+            ], " | ")
+            keep = pa.array([True] * len(table))
+            for words, prefix in queries.search_terms(search.lower()):
+                pattern = r"\b" + re.escape(" ".join(words)) + ("" if prefix else r"\b")
+                keep = pc.and_(keep, pc.match_substring_regex(text, pattern))
+            hits = table.select(["bid_no", "end_at"]).filter(keep).to_pandas()
+            hits = hits.sort_values(["end_at", "bid_no"], ascending=False)
+            hits["month"] = hits["end_at"].str[:7]
+            self.hits[search] = hits.reset_index(drop=True)
+        return self.hits[search]
+
+    def count(self, search=None):
+        if search and search.strip():
+            return len(self._search_hits(search.strip()))
+        return sum(total for _, _, total in self.months())
+
+    def page(self, search, limit, offset):
+        """Rows offset..offset+limit of the cold tier, most recently expired first."""
+        months = self.months()
+        if search and search.strip():
+            wanted = self._search_hits(search.strip()).iloc[offset:offset + limit]
+            paths = [p for month, month_paths, _ in months if month in set(wanted["month"]) for p in month_paths]
+            df = self.read(paths, filter=ds.field("bid_no").isin(wanted["bid_no"].tolist()))
+        else:
+            # Skip whole months by their manifest row counts, open only the ones this page covers
+            paths, before, covered = [], 0, 0
+            for _, month_paths, total in months:
+                if not paths and before + total <= offset:
+                    before += total
+                    continue
+                paths += month_paths
+                covered += total
+                if before + covered >= offset + limit:
+                    break
+            df = self.read(paths)
+            offset -= before
+        if df.empty:
+            return df
+        df = df.sort_values(["end_at", "bid_no"], ascending=False)
+        if not (search and search.strip()):
+            df = df.iloc[offset:offset + limit]
+        return df.reset_index(drop=True)
+
+if __name__ == "__main__":
+    create_db.init_db()
+    moved = compact()
+    print(f"🧊 Moved {moved} expired tender(s) to cold storage")
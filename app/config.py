@@ -1,3 +1,5 @@
+import os
+
 # --- CONFIGURATION ---
 
 # 1. Discord Webhook URL (Get this from Discord Channel Settings > Integrations > Webhooks)
@@ -21,8 +23,123 @@ SEARCH_KEYWORDS = [
     "nameboard"
 ]
 
-# 3. How often to check (in minutes)
-CHECK_INTERVAL = 30 
+# 3. How often to check (in minutes). This is now each keyword's starting interval; the
+#    adaptive scheduler (see #18) speeds busy keywords up and slows quiet ones down from here
+CHECK_INTERVAL = 30
 
-# 4. File to store history (so you don't get duplicate alerts)
+# 4. Old JSON history of alerted bids. It is imported into the database once on startup
+#    (and renamed to .migrated); duplicates are now tracked in the tenders table
 HISTORY_FILE = "seen_bids.json"
+
+# 5. How many search pages run side by side inside the one browser (1 = old sequential mode)
+SCRAPE_CONCURRENCY = 4
+
+# 6. Polite pause each worker takes between its keywords (in seconds)
+KEYWORD_DELAY = 2
+
+# 7. Longest time to wait for a search's results before skipping the keyword (in seconds)
+SEARCH_TIMEOUT = 20
+
+# 8. How to fetch results: "http" calls the listing's JSON endpoint directly (falls back to the
+#    browser for any keyword it fails on), "browser" always drives headless Chromium
+FETCH_BACKEND = "http"
+
+# 9. Site root. Point it at the local stand-in (stand_in.py) for offline testing, either here
+#    or with the GEM_BASE_URL environment variable
+GEM_BASE_URL = os.environ.get("GEM_BASE_URL", "https://bidplus.gem.gov.in")
+
+# 10. Timeout for direct HTTP calls (in seconds)
+HTTP_TIMEOUT = 30
+
+# 11. Browser lifetime: the same Chromium is reused between cycles and relaunched after this
+#     many cycles, or earlier if it crashes or its processes grow past this much RAM (in MB)
+BROWSER_RECYCLE_CYCLES = 24
+BROWSER_MAX_MEMORY_MB = 1500
+
+# 12. Pagination: result pages to walk per keyword on a normal cycle and on a deep backfill
+#     (python main.py --backfill), and how many already-saved bids in a row mean "caught up".
+#     A keyword that runs out of pages before catching up keeps its watermark and walks up to
+#     BACKFILL_MAX_PAGES next cycle, until it reaches that watermark
+MAX_PAGES = 5
+BACKFILL_MAX_PAGES = 100
+KNOWN_RUN_TO_STOP = 5
+
+# 13. SQLite database shared by the scraper and the dashboard
+DB_FILE = "tenders.db"
+
+# 14. Longest wait between retries of an undelivered Discord alert (in seconds)
+ALERT_MAX_BACKOFF = 300
+
+# 15. Local keyword matching: every result is scored against all keywords at once.
+#     Synonyms count as a (weaker) hit for their keyword; any exclusion term drops the bid
+#     (it is saved as Ignored and never alerted). Keywords already covered by a shorter one
+#     ("roller blinds" by "blinds") are not searched separately. EXTRA_SITE_QUERIES are broad
+#     searches whose results are kept only when they match a keyword locally.
+KEYWORD_SYNONYMS = {
+    "blinds": ["blind", "window blind"],
+    "curtains": ["curtain", "drapes"],
+    "sticker": ["stickers", "decal"],
+    "name plate": ["name plates", "nameplate"],
+    "name board": ["name boards", "signboard"],
+    "reflector": ["reflectors", "retro reflective"],
+    "neon sign": ["neon signs", "neon board"],
+    "led board": ["led display board", "led sign board"],
+}
+EXCLUDE_TERMS = []
+EXTRA_SITE_QUERIES = []
+
+# 16. Bid document downloads (background, separate from the scrape): where PDFs are stored,
+#     parallel downloads, minimum gap between download starts (in seconds), and retry limits
+ATTACHMENTS_DIR = "attachments"
+DOWNLOAD_CONCURRENCY = 2
+DOWNLOAD_MIN_INTERVAL = 1.0
+DOWNLOAD_MAX_ATTEMPTS = 5
+DOWNLOAD_MAX_BACKOFF = 1800
+
+# 17. Local Prometheus-style metrics endpoint (http://127.0.0.1:<port>/metrics), 0 to turn it off.
+#     Work-queue workers each take the first free port of the METRICS_WORKER_PORTS above it
+METRICS_PORT = 9108
+METRICS_WORKER_PORTS = 16
+
+# 18. Adaptive polling per keyword: intervals stay between these bounds (in minutes) and aim
+#     for about TARGET_NEW_PER_CHECK new bids per check. Failed checks retry after MIN, then
+#     back off exponentially; keywords that fail now and then are checked less often.
+#     Outside BUSINESS_HOURS (local time, Mon-Fri) intervals are stretched by
+#     OFF_HOURS_SLOWDOWN, and every interval is jittered by +/- SCHEDULE_JITTER
+MIN_CHECK_INTERVAL = 5
+MAX_CHECK_INTERVAL = 240
+TARGET_NEW_PER_CHECK = 1
+BUSINESS_HOURS = (9, 19)
+OFF_HOURS_SLOWDOWN = 3
+SCHEDULE_JITTER = 0.15
+
+# 19. Browser request routing: skip resource types and URLs the scraper never needs (URLs
+#     matching ALLOWED_URL_PATTERNS are never blocked), and keep static scripts/stylesheets
+#     in a disk cache that is revalidated with ETag / Last-Modified instead of re-downloaded
+INTERCEPT_REQUESTS = True
+BLOCKED_RESOURCE_TYPES = ["image", "media", "font"]
+BLOCKED_URL_PATTERNS = ["google-analytics.com", "googletagmanager.com", "doubleclick.net", "facebook.net", "hotjar.com"]
+ALLOWED_URL_PATTERNS = ["/all-bids", "/showbidDocument"]
+CACHED_RESOURCE_TYPES = ["script", "stylesheet"]
+ASSET_CACHE_DIR = "asset_cache"
+
+# 20. Work-queue mode: python main.py --coordinator queues each keyword's check as it falls due
+#     and any number of python main.py --worker processes share the pages. A claimed task is
+#     leased for QUEUE_LEASE_SECONDS and extended by a heartbeat every QUEUE_HEARTBEAT_INTERVAL;
+#     a worker that stops heartbeating loses its task to the next claim. Failed tasks wait
+#     QUEUE_RETRY_DELAY seconds (doubling) and give up after QUEUE_MAX_ATTEMPTS attempts.
+#     Finished tasks are kept for QUEUE_KEEP_HOURS
+QUEUE_BACKEND = "sqlite"
+QUEUE_LEASE_SECONDS = 60
+QUEUE_HEARTBEAT_INTERVAL = 15
+QUEUE_MAX_ATTEMPTS = 3
+QUEUE_RETRY_DELAY = 30
+QUEUE_POLL_INTERVAL = 2
+QUEUE_KEEP_HOURS = 24
+
+# 21. Cold storage: tenders that expired more than COLD_AFTER_DAYS ago (bookmarked ones stay)
+#     move out of the database into Parquet files under COLD_DIR, one folder per expiry month.
+#     The scraper compacts every COMPACT_EVERY_HOURS; python cold_tier.py compacts right away
+COLD_DIR = "cold"
+COLD_AFTER_DAYS = 7
+COMPACT_EVERY_HOURS = 24
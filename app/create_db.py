@@ -1,11 +1,14 @@
 import sqlite3
+import sys
+import config
+import card_parser
 
-def init_db():
-    conn = sqlite3.connect("tenders.db")
-    c = conn.cursor()
-    
+# --- SCHEMA MIGRATIONS ---
+# Each migration runs once, in order; PRAGMA user_version records the last one applied.
+
+def _base_tables(conn):
     # Added 'start_date' to the schema
-    c.execute('''
+    conn.execute('''
         CREATE TABLE IF NOT EXISTS tenders (
             bid_no TEXT PRIMARY KEY,
             title TEXT,           -- This stores the 'Keyword Matched'
@@ -19,9 +22,262 @@ def init_db():
             found_at TEXT
         )
     ''')
-    conn.commit()
-    conn.close()
-    print("✅ New Database created with 'start_date' column.")
+
+    # Per-keyword high-water mark: the newest bid seen at the top of the last crawl
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS crawl_watermarks (
+            keyword TEXT PRIMARY KEY,
+            last_bid_no TEXT,
+            updated_at TEXT
+        )
+    ''')
+
+    # Bids alerted on before the database existed (imported from seen_bids.json)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS legacy_seen_bids (
+            bid_no TEXT PRIMARY KEY
+        )
+    ''')
+
+    # Discord alerts waiting to be delivered (survives restarts)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS pending_alerts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            bid_no TEXT,
+            embed TEXT,           -- JSON of the Discord embed
+            attempts INTEGER DEFAULT 0,
+            last_error TEXT,
+            created_at REAL,
+            next_attempt_at REAL
+        )
+    ''')
+
+def _date_columns(conn):
+    # Sortable 'YYYY-MM-DD HH:MM:SS' copies of the display dates, filled at insert time
+    conn.execute("ALTER TABLE tenders ADD COLUMN start_at TEXT")
+    conn.execute("ALTER TABLE tenders ADD COLUMN end_at TEXT")
+
+    # Backfill existing rows from the free-text columns
+    rows = conn.execute("SELECT bid_no, start_date, end_date FROM tenders").fetchall()
+    conn.executemany(
+        "UPDATE tenders SET start_at = ?, end_at = ? WHERE bid_no = ?",
+        [(card_parser.to_iso(start), card_parser.to_iso(end), bid_no) for bid_no, start, end in rows]
+    )
+
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_tenders_status_end ON tenders (status, end_at)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_tenders_end ON tenders (end_at)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_tenders_found ON tenders (found_at)")
+
+def _search_index(conn):
+    # Full-text index over the searchable columns, kept in sync with tenders by triggers.
+    # It is keyed on the implicit rowid of tenders, which VACUUM may renumber: always
+    # compact the file with vacuum() below, which rebuilds the index afterwards
+    conn.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS tenders_fts USING fts5(
+            bid_no, items, department, title,
+            content='tenders', content_rowid='rowid'
+        )
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS tenders_fts_insert AFTER INSERT ON tenders BEGIN
+            INSERT INTO tenders_fts (rowid, bid_no, items, department, title)
+            VALUES (new.rowid, new.bid_no, new.items, new.department, new.title);
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS tenders_fts_delete AFTER DELETE ON tenders BEGIN
+            INSERT INTO tenders_fts (tenders_fts, rowid, bid_no, items, department, title)
+            VALUES ('delete', old.rowid, old.bid_no, old.items, old.department, old.title);
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS tenders_fts_update AFTER UPDATE OF bid_no, items, department, title ON tenders BEGIN
+            INSERT INTO tenders_fts (tenders_fts, rowid, bid_no, items, department, title)
+            VALUES ('delete', old.rowid, old.bid_no, old.items, old.department, old.title);
+            INSERT INTO tenders_fts (rowid, bid_no, items, department, title)
+            VALUES (new.rowid, new.bid_no, new.items, new.department, new.title);
+        END
+    ''')
+
+    # Index the rows we already have
+    conn.execute("INSERT INTO tenders_fts (tenders_fts) VALUES ('rebuild')")
+
+def _triage_rules(conn):
+    # Auto-triage rules: tenders whose <field> contains <pattern> get status <action> (see triage.py)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS triage_rules (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            field TEXT,           -- items, department or title
+            pattern TEXT,         -- case-insensitive substring
+            action TEXT,          -- status to assign: Ignored or Bookmarked
+            created_at TEXT
+        )
+    ''')
+
+def _match_columns(conn):
+    # Every keyword the local matcher found in the bid (title keeps the primary one), and its score
+    conn.execute("ALTER TABLE tenders ADD COLUMN matched_keywords TEXT")
+    conn.execute("ALTER TABLE tenders ADD COLUMN score INTEGER DEFAULT 0")
+    conn.execute("UPDATE tenders SET matched_keywords = title")
+
+def _pending_downloads(conn):
+    # Bid documents waiting to be downloaded by downloads.py (survives restarts)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS pending_downloads (
+            bid_no TEXT PRIMARY KEY,
+            url TEXT,
+            attempts INTEGER DEFAULT 0,
+            last_error TEXT,
+            next_attempt_at REAL
+        )
+    ''')
+
+def _cycle_history(conn):
+    # One row per scrape cycle: counts plus seconds spent per stage (see metrics.py)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS scrape_cycles (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            started_at TEXT,
+            duration REAL,
+            backend TEXT,
+            mode TEXT,            -- scrape or backfill
+            cards_seen INTEGER,
+            cards_parsed INTEGER,
+            cards_failed INTEGER,
+            new_bids INTEGER,
+            alerts_queued INTEGER,
+            stages TEXT,          -- JSON {stage: seconds}
+            error TEXT
+        )
+    ''')
+
+def _keyword_schedule(conn):
+    # Per-keyword adaptive polling state (see scheduler.py), kept across restarts
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS keyword_schedule (
+            keyword TEXT PRIMARY KEY,
+            interval REAL,        -- minutes
+            next_due REAL,        -- epoch seconds
+            new_rate REAL,        -- smoothed new bids per hour
+            error_rate REAL,
+            failures INTEGER,
+            last_checked REAL
+        )
+    ''')
+
+def _crawl_tasks(conn):
+    # Work-queue mode (see work_queue.py): keyword/page tasks leased to worker processes.
+    # At most one open (pending or leased) task per keyword page, so enqueueing is idempotent
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS crawl_tasks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            round_id INTEGER,        -- id of the keyword's page 1 task
+            keyword TEXT NOT NULL,
+            page INTEGER NOT NULL,
+            backfill INTEGER NOT NULL DEFAULT 0,
+            status TEXT NOT NULL DEFAULT 'pending',  -- pending, leased, done, failed
+            available_at REAL,       -- epoch seconds (retries wait)
+            lease_owner TEXT,
+            lease_expires_at REAL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            new_bids INTEGER,
+            error TEXT,
+            created_at REAL,
+            finished_at REAL
+        )
+    ''')
+    conn.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_crawl_tasks_open ON crawl_tasks(keyword, page) "
+        "WHERE status IN ('pending', 'leased')"
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_crawl_tasks_status ON crawl_tasks(status, available_at)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_crawl_tasks_round ON crawl_tasks(round_id)")
+
+def _cold_files(conn):
+    # Manifest of the Parquet files holding archived tenders (see cold_tier.py)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS cold_files (
+            path TEXT PRIMARY KEY,   -- relative to COLD_DIR
+            month TEXT NOT NULL,     -- expiry month, YYYY-MM
+            rows INTEGER NOT NULL,
+            min_end_at TEXT,
+            max_end_at TEXT,
+            created_at TEXT
+        )
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_cold_files_month ON cold_files(month)")
+
+def _task_watermarks(conn):
+    # Newest bid seen on a round's page 1, carried from page to page and saved as the
+    # keyword's watermark only when the round's last page is done
+    conn.execute("ALTER TABLE crawl_tasks ADD COLUMN watermark TEXT")
+
+def _watermark_catch_up(conn):
+    # 1 when the keyword's last crawl used up its pages before reaching last_bid_no: the
+    # bids in between are still unseen, so the next crawl must not stop early
+    conn.execute("ALTER TABLE crawl_watermarks ADD COLUMN behind INTEGER NOT NULL DEFAULT 0")
+
+MIGRATIONS = [
+    (1, "base tables", _base_tables),
+    (2, "start_at/end_at date columns and indexes", _date_columns),
+    (3, "FTS5 search index", _search_index),
+    (4, "auto-triage rules", _triage_rules),
+    (5, "matched keywords and score", _match_columns),
+    (6, "attachment download queue", _pending_downloads),
+    (7, "scrape cycle history", _cycle_history),
+    (8, "adaptive keyword schedule", _keyword_schedule),
+    (9, "work-queue tasks", _crawl_tasks),
+    (10, "cold storage manifest", _cold_files),
+    (11, "work-queue round watermarks", _task_watermarks),
+    (12, "watermark catch-up flag", _watermark_catch_up),
+]
+
+def migrate(db_file=None):
+    """Brings the database up to the latest schema. Returns the schema version."""
+    conn = sqlite3.connect(db_file or config.DB_FILE, isolation_level=None, timeout=30)
+    try:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        for number, description, apply in MIGRATIONS:
+            if number <= version:
+                continue
+            conn.execute("BEGIN IMMEDIATE")
+            # Another process (dashboard, scraper, a worker) may have migrated while we waited for the lock
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if number <= version:
+                conn.execute("ROLLBACK")
+                continue
+            try:
+                apply(conn)
+                conn.execute(f"PRAGMA user_version = {number}")
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            version = number
+            print(f"🛠️ Applied migration {number}: {description}")
+
+        # Refresh planner stats so the tab queries pick the (status, end_at) index
+        conn.execute("PRAGMA optimize")
+        return version
+    finally:
+        conn.close()
+
+def vacuum(db_file=None):
+    """VACUUM, then rebuild tenders_fts: VACUUM can renumber the rowids the index points at."""
+    conn = sqlite3.connect(db_file or config.DB_FILE, isolation_level=None)
+    try:
+        conn.execute("VACUUM")
+        conn.execute("INSERT INTO tenders_fts (tenders_fts) VALUES ('rebuild')")
+    finally:
+        conn.close()
+    print("🧹 Database vacuumed, search index rebuilt.")
+
+def init_db():
+    version = migrate()
+    print(f"✅ Database ready (schema v{version}).")
 
 if __name__ == "__main__":
-    init_db()
\ No newline at end of file
+    init_db()
+    # python create_db.py --vacuum (never run a plain VACUUM on tenders.db)
+    if "--vacuum" in sys.argv:
+        vacuum()
@@ -1,16 +1,28 @@
 import streamlit as st
-import sqlite3
-import pandas as pd
 import os
 import base64
-from datetime import datetime
+import create_db
+import view_cache
+import triage
 
 # --- CONFIG ---
 st.set_page_config(page_title="DD's GeM Hub", layout="wide", page_icon="🏛️")
 DB_FILE = "tenders.db"
 LOGO_FILE = "logo.png"
+PAGE_SIZE = 50  # Default rows per page in each tab
+PAGE_SIZES = [20, 50, 100, 200]
+STATUS_PERCENTILES = {"p50": 0.5, "p90": 0.9, "p99": 0.99}
+TABLE_COLUMNS = ["bid_no", "items", "department", "matched_keywords", "start_date", "end_date", "link"]
+
+# --- CACHED RESOURCES (built once per server process, not on every rerun) ---
+@st.cache_resource
+def get_view_cache():
+    # Make sure the schema (date columns, indexes) is current before querying it
+    create_db.migrate(DB_FILE)
+    return view_cache.ViewCache(DB_FILE)
 
 # --- HELPER: CONVERT IMAGE TO BASE64 ---
+@st.cache_data
 def get_img_as_base64(file):
     try:
         with open(file, "rb") as f:
@@ -26,27 +38,7 @@ else:
     logo_html = "" 
 
 # --- HELPER: GET STATS FOR HEADER ---
-def get_scan_stats():
-    conn = sqlite3.connect(DB_FILE)
-    try:
-        cursor = conn.cursor()
-        cursor.execute("SELECT MAX(found_at) FROM tenders")
-        last_time = cursor.fetchone()[0]
-        cursor.execute("SELECT COUNT(*) FROM tenders WHERE found_at >= date('now', '-1 day')")
-        recent_count = cursor.fetchone()[0]
-
-        display_time = "N/A"
-        if last_time:
-            dt = datetime.strptime(last_time, '%Y-%m-%d %H:%M:%S')
-            display_time = dt.strftime('%d %b %H:%M')
-            
-        return display_time, recent_count
-    except:
-        return "Offline", 0
-    finally:
-        conn.close()
-
-last_time_str, recent_count = get_scan_stats()
+last_time_str, recent_count = get_view_cache().get_scan_stats()
 
 # --- UI REFINEMENTS CSS ---
 st.markdown(f"""
@@ -122,6 +114,8 @@ st.markdown(f"""
     
     .item-title {{ font-size: 18px; font-weight: 700; color: #f8fafc; margin-bottom: 5px; }}
     .dept-subtitle {{ font-size: 14px; color: #94a3b8; font-weight: 500; margin-bottom: 15px; border-bottom: 1px solid #334155; padding-bottom: 10px; }}
+    .search-snippet {{ font-size: 13px; color: #cbd5e1; margin: -8px 0 12px 0; }}
+    .search-snippet mark {{ background-color: rgba(56, 189, 248, 0.25); color: #f8fafc; border-radius: 3px; padding: 0 2px; }}
     .badge {{ display: inline-block; padding: 4px 10px; border-radius: 6px; font-size: 11px; font-weight: 700; margin-right: 8px; }}
     .badge-blue {{ background-color: rgba(56, 189, 248, 0.1); color: #38bdf8; border: 1px solid #0ea5e9; }} 
     .badge-purple {{ background-color: rgba(192, 132, 252, 0.1); color: #e879f9; border: 1px solid #d946ef; }}
@@ -175,47 +169,37 @@ st.markdown(f"""
 """, unsafe_allow_html=True)
 
 # --- DATA FUNCTIONS ---
-def get_data(status_filter):
-    conn = sqlite3.connect(DB_FILE)
-    query = "SELECT * FROM tenders ORDER BY found_at DESC"
-    try:
-        df = pd.read_sql(query, conn)
-    except Exception:
-        df = pd.DataFrame()
-    conn.close()
-    
-    if df.empty: return df
+def get_page(status_filter, search, page, page_size=PAGE_SIZE):
+    """Total matches plus one page of rows, filtered and searched in SQL and cached (see view_cache.py)."""
+    return get_view_cache().get_page(status_filter, search, page, page_size)
 
-    def parse_date(date_str):
-        try:
-            clean_str = date_str.split(' ')[0] 
-            return datetime.strptime(clean_str, "%d-%m-%Y")
-        except:
-            return datetime.max 
+def update_status(bid_no, new_status, status_mode):
+    """Button callback: runs before the rerun the click triggers, so no extra st.rerun() is needed."""
+    get_view_cache().update_status([bid_no], new_status, status_mode)
 
-    df['real_end_date'] = df['end_date'].apply(parse_date)
-    today = datetime.now()
+def update_selected(bid_nos, new_status, status_mode):
+    """Table-mode callback: one transaction for the whole selection, then a fresh (empty) selection."""
+    get_view_cache().update_status(bid_nos, new_status, status_mode)
+    nonce_key = f"table_nonce_{status_mode}"
+    st.session_state[nonce_key] = st.session_state.get(nonce_key, 0) + 1
 
-    if status_filter == "Expired":
-        df = df[df['real_end_date'] < today]
-    else:
-        df = df[df['real_end_date'] >= today]
-        if status_filter == "Live":
-            df = df[df['status'] == 'New']
-        elif status_filter == "Bookmarked":
-            df = df[df['status'] == 'Bookmarked']
-        elif status_filter == "Ignored":
-            df = df[df['status'] == 'Ignored']
-            
-    return df
+def update_matching(status_mode, search, new_status, label):
+    """Bulk callback: every row matching the current tab + search, across all pages, in one UPDATE."""
+    changed = get_view_cache().update_matching(status_mode, search, new_status)
+    st.session_state["flash"] = f"{label} {changed} tender(s)."
+
+def add_rule():
+    """Rules form callback: reads the form widgets, saves the rule, optionally applies it to Live."""
+    field, pattern, action = st.session_state["rule_field"], st.session_state["rule_pattern"], st.session_state["rule_action"]
+    if not pattern.strip():
+        st.session_state["flash"] = "Enter some text for the rule to match."
+        return
+    changed = get_view_cache().add_rule(field, pattern, action, apply_existing=st.session_state["rule_apply"])
+    st.session_state["rule_pattern"] = ""
+    st.session_state["flash"] = f"Rule added: {field} contains '{pattern.strip()}' → {action}. {changed} live tender(s) updated."
 
-def update_status(bid_no, new_status):
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute("UPDATE tenders SET status = ? WHERE bid_no = ?", (new_status, bid_no))
-    conn.commit()
-    conn.close()
-    st.rerun()
+def delete_rule(rule_id):
+    get_view_cache().delete_rule(rule_id)
 
 # --- CARD RENDERER ---
 def render_single_card(row, status_mode):
@@ -225,12 +209,15 @@ def render_single_card(row, status_mode):
     with st.container(border=True):
         st.markdown(f"<div class='item-title'>{row['items']}</div>", unsafe_allow_html=True)
         st.markdown(f"<div class='dept-subtitle'>🏢 {row['department']}</div>", unsafe_allow_html=True)
+        if isinstance(row.get('snippet'), str):
+            # Search hit with the matched words highlighted
+            st.markdown(f"<div class='search-snippet'>🔎 {row['snippet']}</div>", unsafe_allow_html=True)
         
         if is_expired:
              st.markdown(f"""<span class="badge badge-red">⚠️ EXPIRED</span>""", unsafe_allow_html=True)
         else:
             st.markdown(f"""
-                <span class="badge badge-blue">🎯 {row['title']}</span>
+                <span class="badge badge-blue">🎯 {row.get('matched_keywords') or row['title']}</span>
                 <span class="badge badge-purple">🆔 {row['bid_no']}</span>
             """, unsafe_allow_html=True)
         
@@ -251,17 +238,21 @@ def render_single_card(row, status_mode):
         with cols[1]:
             if not is_expired:
                 if status_mode != "Bookmarked":
-                    if st.button("📌 Save", key=f"bm_{ukey}", use_container_width=True): 
-                        update_status(row['bid_no'], "Bookmarked")
+                    st.button("📌 Save", key=f"bm_{ukey}", use_container_width=True,
+                              on_click=update_status, args=(row['bid_no'], "Bookmarked", status_mode))
                 else:
-                    if st.button("📤 Unsave", key=f"un_{ukey}", use_container_width=True): 
-                        update_status(row['bid_no'], "New")
+                    st.button("📤 Unsave", key=f"un_{ukey}", use_container_width=True,
+                              on_click=update_status, args=(row['bid_no'], "New", status_mode))
             else:
                  st.button("🚫 Ended", key=f"end_{ukey}", disabled=True, use_container_width=True)
 
         with cols[2]:
-             if st.button("🗑️ Ignore", key=f"ig_{ukey}", use_container_width=True): 
-                 update_status(row['bid_no'], "Ignored")
+            if row.get('tier') == "cold":
+                # Compacted into cold storage: read-only
+                st.button("🧊 Archived", key=f"cold_{ukey}", disabled=True, use_container_width=True)
+            else:
+                st.button("🗑️ Ignore", key=f"ig_{ukey}", use_container_width=True,
+                          on_click=update_status, args=(row['bid_no'], "Ignored", status_mode))
 
 # --- UI LOGIC ---
 
@@ -273,23 +264,36 @@ c1, c2, c3 = st.columns([1, 2, 1])
 with c2:
     search_query = st.text_input("Search", placeholder="🔍 Search tenders by ID, Item, or Department...", label_visibility="collapsed")
 
+# 2b. VIEW OPTIONS (compact table for power users, rows per page)
+_, o1, o2, _ = st.columns([1, 1, 1, 1])
+with o1:
+    view_mode = st.radio("View", ["Cards", "Table"], horizontal=True, key="view_mode")
+with o2:
+    page_size = st.selectbox("Per page", PAGE_SIZES, index=PAGE_SIZES.index(PAGE_SIZE), key="page_size")
+
+# 2c. AUTO-TRIAGE RULES (also applied by the scraper to new bids as they are saved)
+_, r1, _ = st.columns([1, 2, 1])
+with r1:
+    with st.expander("⚙️ Auto-triage rules"):
+        for rule in get_view_cache().get_rules():
+            rc1, rc2 = st.columns([4, 1])
+            rc1.markdown(f"**{rule['field']}** contains `{rule['pattern']}` → {rule['action']}")
+            rc2.button("✖ Remove", key=f"rule_del_{rule['id']}", on_click=delete_rule, args=(rule['id'],))
+        f1, f2, f3 = st.columns([1, 2, 1])
+        f1.selectbox("Field", triage.RULE_FIELDS, key="rule_field")
+        f2.text_input("Contains", key="rule_pattern", placeholder="e.g. Ministry of Railways")
+        f3.selectbox("Then", triage.RULE_ACTIONS, key="rule_action")
+        st.checkbox("Also apply to tenders already in the Live Feed", value=True, key="rule_apply")
+        st.button("➕ Add rule", key="rule_add", on_click=add_rule)
+
+if "flash" in st.session_state:
+    st.success(st.session_state.pop("flash"))
+
 # 3. TABS
 tab_live, tab_saved, tab_archive, tab_expired = st.tabs(["📡 Live Feed", "📌 Saved Bids", "🗄️ Archive", "⚠️ Expired"])
 
 # 4. CONTENT
-def render_tab_content(status_mode):
-    df = get_data(status_mode)
-    if search_query:
-        df = df[df['items'].str.contains(search_query, case=False, na=False) | 
-                df['department'].str.contains(search_query, case=False, na=False) | 
-                df['title'].str.contains(search_query, case=False, na=False)]
-    
-    if df.empty:
-        st.info("No tenders found here.")
-        return
-    
-    st.caption(f"Showing {len(df)} tenders")
-    
+def render_cards(df, status_mode):
     for i in range(0, len(df), 2):
         cols = st.columns(2)
         with cols[0]:
@@ -298,17 +302,136 @@ def render_tab_content(status_mode):
             with cols[1]:
                 render_single_card(df.iloc[i+1], status_mode)
 
+def render_table(df, status_mode):
+    """One st.dataframe element for the whole page, with multi-row selection and bulk actions."""
+    table = df[TABLE_COLUMNS].reset_index(drop=True)
+    nonce = st.session_state.get(f"table_nonce_{status_mode}", 0)
+    event = st.dataframe(
+        table, hide_index=True, use_container_width=True,
+        on_select="rerun", selection_mode="multi-row", key=f"table_{status_mode}_{nonce}",
+        column_config={
+            "bid_no": "Bid No", "items": "Items", "department": "Department", "matched_keywords": "Keywords",
+            "start_date": "Start", "end_date": "End",
+            "link": st.column_config.LinkColumn("PDF", display_text="📄 Open")
+        }
+    )
+    selected = table.iloc[event.selection.rows]["bid_no"].tolist()
+    if "tier" in df:
+        # Rows from cold storage are read-only
+        cold = set(df.loc[df["tier"] == "cold", "bid_no"])
+        selected = [bid_no for bid_no in selected if bid_no not in cold]
+
+    a1, a2, a3 = st.columns([1, 1, 2])
+    if status_mode == "Bookmarked":
+        a1.button(f"📤 Unsave {len(selected)}", key=f"bulk_un_{status_mode}", disabled=not selected,
+                  on_click=update_selected, args=(selected, "New", status_mode))
+    elif status_mode != "Expired":
+        a1.button(f"📌 Save {len(selected)}", key=f"bulk_bm_{status_mode}", disabled=not selected,
+                  on_click=update_selected, args=(selected, "Bookmarked", status_mode))
+    a2.button(f"🗑️ Ignore {len(selected)}", key=f"bulk_ig_{status_mode}", disabled=not selected,
+              on_click=update_selected, args=(selected, "Ignored", status_mode))
+
+def render_tab_content(status_mode):
+    """Only one page is ever rendered, so render time is bounded by page_size, not by the tab size."""
+    page_key = f"page_{status_mode}"
+    page = st.session_state.get(page_key, 1)
+    total, df = get_page(status_mode, search_query, page, page_size)
+
+    if total == 0:
+        st.info("No tenders found here.")
+        return
+
+    pages = (total + page_size - 1) // page_size
+    if page > pages:
+        # Search (or a bigger page size) left fewer pages than the current one
+        page = st.session_state[page_key] = pages
+        total, df = get_page(status_mode, search_query, page, page_size)
+
+    first = (page - 1) * page_size + 1
+    st.caption(f"Showing {first}-{first + len(df) - 1} of {total} tenders")
+
+    # Bulk actions over the whole filtered result, not just this page
+    if search_query.strip() and status_mode != "Expired":
+        b1, b2, _ = st.columns([1, 1, 2])
+        if status_mode == "Ignored":
+            b1.button(f"📤 Restore all {total} matching", key=f"all_un_{status_mode}",
+                      on_click=update_matching, args=(status_mode, search_query, "New", "Restored"))
+        else:
+            b1.button(f"🗑️ Ignore all {total} matching", key=f"all_ig_{status_mode}",
+                      on_click=update_matching, args=(status_mode, search_query, "Ignored", "Ignored"))
+            if status_mode == "Live":
+                b2.button(f"📌 Save all {total} matching", key=f"all_bm_{status_mode}",
+                          on_click=update_matching, args=(status_mode, search_query, "Bookmarked", "Saved"))
+
+    if view_mode == "Table":
+        render_table(df, status_mode)
+    else:
+        render_cards(df, status_mode)
+
+    if pages > 1:
+        st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, key=page_key)
+
 with tab_live: render_tab_content("Live")
 with tab_saved: render_tab_content("Bookmarked")
 with tab_archive: render_tab_content("Ignored")
 with tab_expired: render_tab_content("Expired")
 
+# 4b. SYSTEM STATUS (scrape cycle latency, from the scrape_cycles history; the footer links here)
+def render_system_status():
+    cycles = get_view_cache().get_cycle_history()
+    st.markdown('<div id="system-status"></div>', unsafe_allow_html=True)
+    with st.expander("📈 System Status"):
+        if cycles.empty:
+            st.info("No scrape cycles recorded yet.")
+            return
+
+        failed = int(cycles["error"].notna().sum())
+        m = st.columns(5)
+        m[0].metric("Cycles", len(cycles), f"{failed} failed" if failed else None, delta_color="inverse")
+        for col, (label, q) in zip(m[1:], STATUS_PERCENTILES.items()):
+            col.metric(f"Cycle {label}", f"{cycles['duration'].quantile(q):.1f}s")
+        m[4].metric("New bids / cycle", f"{cycles['new_bids'].mean():.1f}")
+
+        # Seconds per stage and cycle (summed across workers), cycles without the stage left out
+        stage_columns = [c for c in cycles.columns if c.startswith("stage_")]
+        if stage_columns:
+            stages = cycles[stage_columns].quantile(list(STATUS_PERCENTILES.values())).T
+            stages.columns = list(STATUS_PERCENTILES)
+            stages.index = [c[len("stage_"):] for c in stage_columns]
+            st.caption("Seconds per stage per cycle")
+            st.dataframe(stages.sort_values("p90", ascending=False).round(2), use_container_width=True)
+
+        st.caption("Recent cycles")
+        st.dataframe(
+            cycles[["started_at", "duration", "backend", "mode", "cards_seen", "new_bids", "alerts_queued", "error"]].head(20).round(1),
+            hide_index=True, use_container_width=True
+        )
+
+render_system_status()
+
+# 4c. HISTORY (expiry months and departments, across the database and cold storage)
+def render_history():
+    per_month, per_department = get_view_cache().get_history()
+    with st.expander("📊 Tender History"):
+        if per_month.empty:
+            st.info("No tenders in the last year.")
+            return
+        h1, h2 = st.columns([2, 1])
+        with h1:
+            st.caption("Tenders per closing month")
+            st.bar_chart(per_month)
+        with h2:
+            st.caption("Top departments")
+            st.dataframe(per_department.head(10).rename("tenders"), use_container_width=True)
+
+render_history()
+
 # --- 5. FOOTER (INJECTED AT BOTTOM) ---
 st.markdown("""
     <div class="custom-footer">
         Made by <b>VORSV Inc.</b> &copy; 2026<br>
         <br>
-        <a href="#">System Status</a> &bull; 
+        <a href="#system-status">System Status</a> &bull; 
         <a href="#">Logs</a> &bull; 
         <a href="#">Documentation</a>
     </div>
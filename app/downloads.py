@@ -0,0 +1,272 @@
+import atexit
+import hashlib
+import os
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+import requests
+from requests.adapters import HTTPAdapter
+import config
+import fetchers
+
+CHUNK_SIZE = 64 * 1024
+
+class DownloadError(Exception):
+    """A download attempt failed; the job is retried later (after retry_after seconds if the server said so)."""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+# --- BACKGROUND ATTACHMENT DOWNLOADER ---
+class AttachmentDownloader:
+    """
+    Fetches bid PDFs in the background with a small pool of worker threads over
+    one pooled session, rate limited on its own so it never competes with the
+    scrape. Jobs live in the pending_downloads table until they succeed.
+
+    Files are stored content-addressed (attachments/ab/cd/<sha256>.pdf), so the same
+    document attached to several bids is kept once. Partial downloads are kept in
+    attachments/partial/ and resumed with a Range request on the next attempt.
+    """
+
+    def __init__(self, db_file=None, root=None, concurrency=None):
+        self.root = root or config.ATTACHMENTS_DIR
+        self.concurrency = concurrency or config.DOWNLOAD_CONCURRENCY
+        self.conn = sqlite3.connect(db_file or config.DB_FILE, check_same_thread=False, timeout=30)
+        self.lock = threading.Lock()
+        self.session = self._new_session()
+        self.jobs = queue.Queue(maxsize=self.concurrency)
+        self.in_flight = set()
+        self.wake = threading.Event()
+        self.stopping = threading.Event()
+        self.next_slot = 0  # Earliest time the next request may start (shared rate limit)
+        self.threads = [threading.Thread(target=self._feed, name="download-feeder", daemon=True)] + [
+            threading.Thread(target=self._work, name=f"download-{i}", daemon=True) for i in range(self.concurrency)
+        ]
+
+    def _new_session(self):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.concurrency)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers.update({"User-Agent": fetchers.USER_AGENT})
+        return session
+
+    def start(self):
+        os.makedirs(os.path.join(self.root, "partial"), exist_ok=True)
+        queued = self.enqueue_missing()
+        pending = self.pending_count()
+        if pending:
+            print(f"📎 {pending} attachment(s) to download ({queued} newly queued)")
+        for thread in self.threads:
+            thread.start()
+        return self
+
+    # --- producer side ---
+    def enqueue(self, tenders):
+        """Queues the document of each tender. Returns immediately."""
+        rows = [(t['bid_no'], t['link'], time.time()) for t in tenders if "/showbidDocument/" in (t.get('link') or "")]
+        if not rows:
+            return
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO pending_downloads (bid_no, url, next_attempt_at) VALUES (?, ?, ?)", rows
+            )
+        self.wake.set()
+
+    def enqueue_missing(self):
+        """Queues live, non-ignored tenders that still have no pdf_path. Returns how many were added."""
+        with self.lock, self.conn:
+            cursor = self.conn.execute('''
+                INSERT OR IGNORE INTO pending_downloads (bid_no, url, next_attempt_at)
+                SELECT bid_no, link, ? FROM tenders
+                WHERE pdf_path IS NULL AND status != 'Ignored' AND link LIKE '%/showbidDocument/%'
+                  AND (end_at >= datetime('now', 'localtime') OR end_at IS NULL)
+            ''', (time.time(),))
+        return cursor.rowcount
+
+    def pending_count(self):
+        with self.lock:
+            return self.conn.execute(
+                "SELECT COUNT(*) FROM pending_downloads WHERE attempts < ?", (config.DOWNLOAD_MAX_ATTEMPTS,)
+            ).fetchone()[0]
+
+    # --- scheduling ---
+    def _due_jobs(self):
+        with self.lock:
+            due = self.conn.execute(
+                "SELECT bid_no, url FROM pending_downloads WHERE next_attempt_at <= ? AND attempts < ? ORDER BY next_attempt_at LIMIT ?",
+                (time.time(), config.DOWNLOAD_MAX_ATTEMPTS, self.concurrency * 2)
+            ).fetchall()
+            due = [job for job in due if job[0] not in self.in_flight]
+            self.in_flight.update(job[0] for job in due)
+        return due
+
+    def _feed(self):
+        """Hands due jobs to the workers, one at a time per bid."""
+        while not self.stopping.is_set():
+            try:
+                due = self._due_jobs()
+            except Exception as e:
+                # e.g. the database is locked; keep the thread alive and look again shortly
+                print(f"❌ Attachment feeder error: {type(e).__name__}: {e}")
+                self.stopping.wait(5)
+                continue
+            if not due:
+                self.wake.wait(timeout=5)
+                self.wake.clear()
+                continue
+            for job in due:
+                while not self.stopping.is_set():
+                    try:
+                        self.jobs.put(job, timeout=1)
+                        break
+                    except queue.Full:
+                        continue
+
+    def _wait_for_slot(self):
+        """Spaces request starts DOWNLOAD_MIN_INTERVAL apart across all workers."""
+        with self.lock:
+            slot = max(time.time(), self.next_slot)
+            self.next_slot = slot + config.DOWNLOAD_MIN_INTERVAL
+        self.stopping.wait(max(0, slot - time.time()))
+
+    def _work(self):
+        while not self.stopping.is_set():
+            try:
+                bid_no, url = self.jobs.get(timeout=1)
+            except queue.Empty:
+                continue
+            try:
+                self._attempt(bid_no, url)
+            except Exception as e:
+                # Recording the outcome failed (e.g. a locked database): the job is still
+                # queued, so it is picked up again after a pause
+                print(f"❌ Attachment worker error on {bid_no}: {type(e).__name__}: {e}")
+                self.stopping.wait(5)
+            finally:
+                with self.lock:
+                    self.in_flight.discard(bid_no)
+                self.wake.set()
+
+    def _attempt(self, bid_no, url):
+        try:
+            self._wait_for_slot()
+            path = self.download(bid_no, url)
+            self._done(bid_no, path)
+        except DownloadError as e:
+            if not self.stopping.is_set():
+                self._failed(bid_no, str(e), e.retry_after)
+        except (requests.RequestException, OSError, ValueError) as e:
+            self._failed(bid_no, f"{type(e).__name__}: {e}")
+
+    def _done(self, bid_no, path):
+        with self.lock, self.conn:
+            self.conn.execute("UPDATE tenders SET pdf_path = ? WHERE bid_no = ?", (path, bid_no))
+            self.conn.execute("DELETE FROM pending_downloads WHERE bid_no = ?", (bid_no,))
+        print(f"📎 Saved attachment for {bid_no}")
+
+    def _failed(self, bid_no, error, delay=None):
+        with self.lock, self.conn:
+            self.conn.execute("UPDATE pending_downloads SET attempts = attempts + 1, last_error = ? WHERE bid_no = ?", (error, bid_no))
+            attempts = self.conn.execute("SELECT attempts FROM pending_downloads WHERE bid_no = ?", (bid_no,)).fetchone()[0]
+            if delay is None:
+                delay = min(config.DOWNLOAD_MAX_BACKOFF, 2 ** attempts * 10)
+            self.conn.execute("UPDATE pending_downloads SET next_attempt_at = ? WHERE bid_no = ?", (time.time() + delay, bid_no))
+        if attempts >= config.DOWNLOAD_MAX_ATTEMPTS:
+            print(f"❌ Giving up on attachment for {bid_no}: {error}")
+        else:
+            print(f"⚠️ Attachment for {bid_no} failed ({error}), retrying in {delay}s")
+
+    # --- one download ---
+    def _partial_path(self, bid_no):
+        return os.path.join(self.root, "partial", hashlib.sha1(bid_no.encode()).hexdigest() + ".part")
+
+    def content_path(self, digest):
+        return os.path.join(self.root, digest[:2], digest[2:4], digest + ".pdf")
+
+    def download(self, bid_no, url):
+        """Downloads (or resumes) one document and files it by hash. Returns its path."""
+        partial = self._partial_path(bid_no)
+        offset = os.path.getsize(partial) if os.path.exists(partial) else 0
+        headers = {"Range": f"bytes={offset}-"} if offset else {}
+
+        with self.session.get(url, headers=headers, stream=True, timeout=config.HTTP_TIMEOUT) as response:
+            if response.status_code == 416:
+                # Our partial file is already complete (or stale); start over next attempt
+                os.remove(partial)
+                raise DownloadError("HTTP 416 on resume")
+            if response.status_code == 429:
+                raise DownloadError("HTTP 429", _retry_after(response.headers.get("Retry-After")))
+            response.raise_for_status()
+            if "html" in response.headers.get("Content-Type", ""):
+                raise DownloadError("got an HTML page instead of a document")
+
+            # 206 continues our partial file; a plain 200 means the server ignored Range
+            resuming = offset and response.status_code == 206
+            with open(partial, "ab" if resuming else "wb") as f:
+                for chunk in response.iter_content(CHUNK_SIZE):
+                    if self.stopping.is_set():
+                        raise DownloadError("stopped mid-download (will resume)")
+                    f.write(chunk)
+
+        digest = _sha256(partial)
+        path = self.content_path(digest)
+        if os.path.exists(path):
+            os.remove(partial)  # Same document already stored for another bid
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(partial, path)
+        return path
+
+    def stop(self, timeout=10):
+        """Stops the workers; unfinished downloads stay queued and resume next run."""
+        self.stopping.set()
+        self.wake.set()
+        deadline = time.time() + timeout
+        for thread in self.threads:
+            if thread.is_alive():
+                thread.join(timeout=max(0, deadline - time.time()))
+        self.session.close()
+
+def _retry_after(value, default=60):
+    """Seconds to wait from a Retry-After header: either a number or an HTTP date."""
+    if not value:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return default
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0, round((when - datetime.now(timezone.utc)).total_seconds()))
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+_downloader = None
+
+def get_downloader(start=True):
+    """
+    The process-wide AttachmentDownloader, started on first use and stopped at exit.
+    With start=False it only queues (see alerts.get_dispatcher).
+    """
+    global _downloader
+    if _downloader is None:
+        _downloader = AttachmentDownloader()
+        if start:
+            _downloader.start()
+            atexit.register(_downloader.stop)
+    return _downloader
@@ -0,0 +1,232 @@
+import json
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import requests
+from requests.adapters import HTTPAdapter
+import config
+import browser
+import metrics
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+# Hidden form field / cookie the listing uses for its CSRF token
+CSRF_FIELD = "csrf_bd_gem_nk"
+CSRF_COOKIE = "csrf_gem_cookie"
+CSRF_INPUT_RE = re.compile(r'name=["\']' + CSRF_FIELD + r'["\'][^>]*value=["\']([^"\']+)')
+
+class FetchError(Exception):
+    """Raised when a backend cannot return results for a keyword."""
+
+# --- BACKEND INTERFACE ---
+class Fetcher:
+    """
+    A fetch backend turns search keywords into raw cards:
+    {"bid_no": ..., "link": ..., "text": <card text>} or, when the backend already
+    has structured data, {"bid_no": ..., "link": ..., "fields": {...}}.
+    """
+    name = "base"
+
+    def search_keywords(self, keywords, max_pages=1, stop_check=None):
+        """
+        Returns ({keyword: [card, ...]}, {keyword: seconds}, {keyword: why paging stopped,
+        one of browser.STOP_*}). Failed keywords are left out. Results are walked
+        newest-first for up to max_pages pages per keyword, stopping early once
+        stop_check(keyword, cards_on_page) returns True.
+        """
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+class BrowserFetcher(Fetcher):
+    """The original path: drives the all-bids page in headless Chromium."""
+    name = "browser"
+
+    def search_keywords(self, keywords, max_pages=1, stop_check=None):
+        return browser.search_keywords(keywords, max_pages=max_pages, stop_check=stop_check)
+
+class HttpFetcher(Fetcher):
+    """
+    Calls the JSON endpoint behind the all-bids listing directly.
+    One pooled requests.Session keeps the cookies and CSRF token between calls.
+    """
+    name = "http"
+
+    def __init__(self, base_url=None, session=None):
+        self.base_url = (base_url or config.GEM_BASE_URL).rstrip("/")
+        self.session = session or self._new_session()
+        self.token = None
+        self._token_lock = threading.Lock()
+
+    def _new_session(self):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, config.SCRAPE_CONCURRENCY))
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers.update({"User-Agent": USER_AGENT, "X-Requested-With": "XMLHttpRequest"})
+        return session
+
+    def refresh_token(self):
+        """Loads the listing page once to pick up session cookies and the CSRF token."""
+        with self._token_lock, metrics.span("navigate"):
+            response = self.session.get(f"{self.base_url}/all-bids", timeout=config.HTTP_TIMEOUT)
+            response.raise_for_status()
+            match = CSRF_INPUT_RE.search(response.text)
+            self.token = match.group(1) if match else self.session.cookies.get(CSRF_COOKIE)
+            if not self.token:
+                raise FetchError("no CSRF token on the all-bids page")
+        return self.token
+
+    def _post_search(self, keyword, page_no):
+        payload = {
+            "page": page_no,
+            "param": {"searchBid": keyword, "searchType": "fullText"},
+            "filter": {
+                "bidStatusType": "ongoing_bids",
+                "byType": "all",
+                "highBidValue": "",
+                "byEndDate": {"from": "", "to": ""},
+                "sort": "Bid-Start-Date-Latest"
+            }
+        }
+        return self.session.post(
+            f"{self.base_url}/all-bids-data",
+            data={"payload": json.dumps(payload), CSRF_FIELD: self.token},
+            headers={"Referer": f"{self.base_url}/all-bids"},
+            timeout=config.HTTP_TIMEOUT
+        )
+
+    def fetch_page(self, keyword, page_no=1):
+        """Returns (cards, total_results) for one result page of a keyword."""
+        if not self.token:
+            self.refresh_token()
+
+        with metrics.span("http_request"):
+            response = self._post_search(keyword, page_no)
+        if response.status_code in (403, 419) or "json" not in response.headers.get("Content-Type", ""):
+            # Token expired or we were bounced to an HTML page, retry once with a fresh one
+            self.refresh_token()
+            response = self._post_search(keyword, page_no)
+        response.raise_for_status()
+
+        try:
+            result = response.json()["response"]["response"]
+        except (ValueError, KeyError, TypeError) as e:
+            raise FetchError(f"unexpected all-bids-data payload: {e}")
+        return [self.doc_to_card(doc) for doc in result.get("docs", [])], result.get("numFound", 0)
+
+    def doc_to_card(self, doc):
+        """Maps one JSON doc onto the same fields the card-text parser produces."""
+        def first(key, default=None):
+            # Solr-style docs wrap most values in one-element lists
+            value = doc.get(key)
+            if isinstance(value, list):
+                value = value[0] if value else None
+            return default if value in (None, "") else value
+
+        b_id = first("b_id")
+        items = str(first("b_category_name", "N/A"))
+        return {
+            "bid_no": str(first("b_bid_number", "Unknown")).strip(),
+            "link": f"{self.base_url}/showbidDocument/{b_id}" if b_id else f"{self.base_url}/all-bids",
+            "fields": {
+                "items": items,
+                "start_date": _format_date(first("final_start_date_sort")),
+                "end_date": _format_date(first("final_end_date_sort")),
+                "department": str(first("ba_official_details_minName") or first("ba_official_details_deptName") or "Unknown")
+            }
+        }
+
+    def _search_one(self, keyword, max_pages, stop_check):
+        started = time.perf_counter()
+        cards, seen = [], 0
+        for page_no in range(1, max_pages + 1):
+            page_cards, total = self.fetch_page(keyword, page_no)
+            cards.extend(page_cards)
+            seen += len(page_cards)
+            if stop_check and page_cards and stop_check(keyword, page_cards):
+                stop = browser.STOP_CAUGHT_UP
+                break
+            if not page_cards or seen >= total:
+                stop = browser.STOP_END
+                break
+            # Polite pause between pages
+            time.sleep(config.KEYWORD_DELAY)
+        else:
+            stop = browser.STOP_PAGE_CAP
+        elapsed = time.perf_counter() - started
+        metrics.observe("search", elapsed, keyword=keyword, backend="http")
+
+        # Polite pause, same as the browser workers
+        time.sleep(config.KEYWORD_DELAY)
+        return cards, elapsed, stop
+
+    def search_keywords(self, keywords, max_pages=1, stop_check=None):
+        # Fetch the token once up front so the workers don't all race for it
+        if not self.token:
+            self.refresh_token()
+
+        results, timings, stops = {}, {}, {}
+        workers = max(1, min(config.SCRAPE_CONCURRENCY, len(keywords) or 1))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {keyword: pool.submit(self._search_one, keyword, max_pages, stop_check) for keyword in keywords}
+            for keyword, future in futures.items():
+                try:
+                    results[keyword], timings[keyword], stops[keyword] = future.result()
+                except Exception as e:
+                    metrics.inc("search_errors", backend="http")
+                    print(f"⚠️ HTTP search failed for '{keyword}': {e}")
+        return results, timings, stops
+
+    def close(self):
+        self.session.close()
+
+class FallbackFetcher(Fetcher):
+    """Tries the cheap backend first and only sends the keywords it failed on to the fallback."""
+
+    def __init__(self, primary, fallback):
+        self.primary = primary
+        self.fallback = fallback
+        self.name = f"{primary.name}+{fallback.name}"
+
+    def search_keywords(self, keywords, max_pages=1, stop_check=None):
+        try:
+            results, timings, stops = self.primary.search_keywords(keywords, max_pages, stop_check)
+        except Exception as e:
+            print(f"⚠️ {self.primary.name} backend failed: {e}")
+            results, timings, stops = {}, {}, {}
+
+        missing = [k for k in keywords if k not in results]
+        if missing:
+            print(f"↩️ Falling back to {self.fallback.name} for {len(missing)} keyword(s)")
+            extra_results, extra_timings, extra_stops = self.fallback.search_keywords(missing, max_pages, stop_check)
+            results.update(extra_results)
+            timings.update(extra_timings)
+            stops.update(extra_stops)
+        return results, timings, stops
+
+    def close(self):
+        self.primary.close()
+        self.fallback.close()
+
+# --- HELPERS ---
+def _format_date(value):
+    """'2026-01-12T11:00:00Z' -> '12-01-2026 11:00 AM' (the format the cards show)."""
+    if not value:
+        return "N/A"
+    try:
+        return datetime.strptime(str(value)[:19], "%Y-%m-%dT%H:%M:%S").strftime("%d-%m-%Y %I:%M %p")
+    except ValueError:
+        return str(value)
+
+def get_fetcher(backend=None):
+    """Builds the backend named in config.FETCH_BACKEND ('http' or 'browser')."""
+    backend = backend or config.FETCH_BACKEND
+    if backend == "browser":
+        return BrowserFetcher()
+    if backend == "http":
+        return FallbackFetcher(HttpFetcher(), BrowserFetcher())
+    raise ValueError(f"Unknown FETCH_BACKEND: {backend}")
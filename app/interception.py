@@ -0,0 +1,162 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import time
+import config
+import metrics
+
+# --- BROWSER REQUEST ROUTING ---
+# Every request a scraping context makes goes through route_request():
+#   - resource types / URLs we never need (images, fonts, trackers) are aborted,
+#   - cacheable static assets (scripts, stylesheets) come from a disk cache,
+#     revalidated with If-None-Match / If-Modified-Since once they go stale,
+#   - everything else goes to the network untouched.
+# RequestStats totals what was transferred, served from cache and blocked.
+
+MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+
+class RequestStats:
+    """Bytes and request counts for one scrape cycle (shared by all its pages)."""
+
+    def __init__(self):
+        self.network_bytes = 0
+        self.cache_bytes = 0
+        self.blocked = 0
+        self.cache_hits = 0
+        self.revalidated = 0
+
+    def add_network(self, size):
+        self.network_bytes += size
+        metrics.inc("browser_bytes_network", size)
+
+    def add_cache(self, size, revalidated):
+        self.cache_bytes += size
+        self.cache_hits += 1
+        self.revalidated += revalidated
+        metrics.inc("browser_bytes_cache", size)
+
+    def add_blocked(self, resource_type):
+        self.blocked += 1
+        metrics.inc("browser_requests_blocked", type=resource_type)
+
+    def summary(self):
+        return (f"📦 {self.network_bytes / 1024:.0f} KB transferred, {self.cache_bytes / 1024:.0f} KB from cache "
+                f"({self.cache_hits} hits, {self.revalidated} revalidated), {self.blocked} request(s) blocked")
+
+class AssetCache:
+    """Static responses on disk: <sha1 of url>.body plus .json with status, headers and freshness."""
+
+    def __init__(self, root=None):
+        self.root = root or config.ASSET_CACHE_DIR
+        os.makedirs(self.root, exist_ok=True)
+
+    def _paths(self, url):
+        key = os.path.join(self.root, hashlib.sha1(url.encode()).hexdigest())
+        return key + ".json", key + ".body"
+
+    def get(self, url):
+        """(meta, body) for a cached url, or (None, None)."""
+        meta_path, body_path = self._paths(url)
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            with open(body_path, "rb") as f:
+                return meta, f.read()
+        except (OSError, ValueError):
+            return None, None
+
+    def put(self, url, status, headers, body):
+        meta_path, body_path = self._paths(url)
+        max_age = MAX_AGE_RE.search(headers.get("cache-control", ""))
+        meta = {
+            "url": url,
+            "status": status,
+            "headers": {k: v for k, v in headers.items() if k not in ("content-length", "content-encoding", "transfer-encoding")},
+            "fetched_at": time.time(),
+            "max_age": int(max_age.group(1)) if max_age else 0,
+        }
+        # Body first: a meta file always points at a complete body
+        with open(body_path + ".tmp", "wb") as f:
+            f.write(body)
+        os.replace(body_path + ".tmp", body_path)
+        with open(meta_path + ".tmp", "w") as f:
+            json.dump(meta, f)
+        os.replace(meta_path + ".tmp", meta_path)
+
+    def touch(self, url, meta):
+        """Marks a revalidated entry fresh again."""
+        meta["fetched_at"] = time.time()
+        meta_path, _ = self._paths(url)
+        with open(meta_path, "w") as f:
+            json.dump(meta, f)
+
+def is_blocked(request):
+    url = request.url
+    if any(pattern in url for pattern in config.ALLOWED_URL_PATTERNS):
+        return False
+    return request.resource_type in config.BLOCKED_RESOURCE_TYPES or any(p in url for p in config.BLOCKED_URL_PATTERNS)
+
+def is_cacheable(status, headers):
+    cache_control = headers.get("cache-control", "")
+    return status == 200 and "no-store" not in cache_control and ("etag" in headers or "last-modified" in headers)
+
+async def _serve_cached(route, request, cache, stats):
+    meta, body = cache.get(request.url)
+    if meta is not None and time.time() - meta["fetched_at"] < meta["max_age"]:
+        await route.fulfill(status=meta["status"], headers=meta["headers"], body=body)
+        stats.add_cache(len(body), revalidated=False)
+        return
+
+    headers = dict(request.headers)
+    if meta is not None:
+        if "etag" in meta["headers"]:
+            headers["if-none-match"] = meta["headers"]["etag"]
+        if "last-modified" in meta["headers"]:
+            headers["if-modified-since"] = meta["headers"]["last-modified"]
+
+    response = await route.fetch(headers=headers)
+    if response.status == 304 and meta is not None:
+        cache.touch(request.url, meta)
+        await route.fulfill(status=meta["status"], headers=meta["headers"], body=body)
+        stats.add_cache(len(body), revalidated=True)
+        return
+
+    fresh = await response.body()
+    stats.add_network(len(fresh))
+    if is_cacheable(response.status, response.headers):
+        cache.put(request.url, response.status, response.headers, fresh)
+    await route.fulfill(response=response, body=fresh)
+
+async def install(context, cache, stats):
+    """Routes every request of a browser context through the block list and the asset cache."""
+    routed = set()  # Requests we fetched ourselves (their bytes are already counted)
+
+    async def route_request(route):
+        request = route.request
+        if is_blocked(request):
+            stats.add_blocked(request.resource_type)
+            await route.abort()
+            return
+        if request.resource_type in config.CACHED_RESOURCE_TYPES and request.method == "GET":
+            routed.add(request)
+            try:
+                await _serve_cached(route, request, cache, stats)
+                return
+            except Exception:
+                routed.discard(request)  # Cache trouble: let the browser load it normally
+        await route.continue_()
+
+    async def count_transfer(request):
+        if request in routed:
+            routed.discard(request)
+            return
+        try:
+            sizes = await request.sizes()
+            stats.add_network(sizes["responseBodySize"] + sizes["responseHeadersSize"])
+        except Exception:
+            pass  # Page or context already closed
+
+    await context.route("**/*", route_request)
+    context.on("requestfinished", lambda request: asyncio.ensure_future(count_transfer(request)))
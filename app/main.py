@@ -1,230 +1,375 @@
 import json
 import time
 import os
-import requests
+import socket
+import sys
 import sqlite3
+from collections import Counter
 from datetime import datetime
-from playwright.sync_api import sync_playwright
-import schedule
 import config  # Importing your config.py
+import browser
+import fetchers
+import create_db
+import card_parser
+import storage
+import alerts
+import downloads
+import cold_tier
+import matcher
+import metrics
+import scheduler
+import work_queue
+
+# --- CARD PARSING ---
+def tender_from_record(record, keyword, match=None):
+    """Turns a parsed card into the tender dict we store and alert on."""
+    match = match or matcher.Match([keyword])
+    tender = record.to_dict()
+    tender["title"] = match.primary or keyword  # Using the matched keyword as title tag
+    tender["matched_keywords"] = ", ".join(match.keywords or [keyword])
+    tender["score"] = match.score
+    tender["items"] = record.items[:150]  # Truncate long item lists
+    if match.excluded:
+        tender["status"] = "Ignored"
+    return tender
+
+def site_queries():
+    """Searches to run this cycle: the keywords not covered by a shorter one, plus the broad extras."""
+    queries = matcher.site_queries(config.SEARCH_KEYWORDS)
+    return queries + [q for q in config.EXTRA_SITE_QUERIES if q not in queries]
+
+# --- INCREMENTAL CRAWL ---
+def make_stop_check(store, watermarks, behind=()):
+    """
+    Builds the callback the fetchers use to stop paging a keyword: stop at last
+    cycle's watermark bid, or after KNOWN_RUN_TO_STOP already-saved bids in a row.
+    Keywords that are `behind` only stop at the watermark: the bids saved by the
+    crawl that ran out of pages sit in front of the ones it never reached.
+    """
+    known_runs = {}
+
+    def stop_check(keyword, cards):
+        run = known_runs.get(keyword, 0)
+        known = store.existing_bids(card["bid_no"] for card in cards)
+        for card in cards:
+            if card["bid_no"] == "Unknown":
+                continue
+            if card["bid_no"] == watermarks.get(keyword):
+                return True
+            run = run + 1 if card["bid_no"] in known else 0
+            if run >= config.KNOWN_RUN_TO_STOP and keyword not in behind:
+                return True
+        known_runs[keyword] = run
+        return False
+
+    return stop_check
+
+def newest_bid(cards):
+    """The first real bid number on a newest-first result list (the next watermark)."""
+    return next((card["bid_no"] for card in cards if card["bid_no"] != "Unknown"), None)
+
+def fell_behind(keyword, stop, watermarks, behind):
+    """
+    True when a crawl used up its pages before reaching the keyword's watermark, so
+    the watermark must stay put. A catch-up crawl that runs out of pages as well gives up
+    (python main.py --backfill fills the rest), so one stuck keyword can't page deep forever.
+    """
+    if stop != browser.STOP_PAGE_CAP or keyword not in watermarks:
+        return False
+    if keyword in behind:
+        print(f"⚠️ '{keyword}' is still behind after {config.BACKFILL_MAX_PAGES} pages, moving its watermark anyway")
+        return False
+    print(f"🧗 '{keyword}' hit the page limit before reaching known bids, catching up next cycle")
+    return True
+
+# --- LOCAL MATCHING (every card against every keyword, synonym and exclusion) ---
+def process_cards(store, keyword, cards, claimed, parse_failures, tally):
+    """
+    Dedups, parses, matches, saves and alerts one keyword's cards. `claimed` holds the
+    bids earlier keywords took this cycle; parse failures and auto-ignored/unmatched
+    cards are counted into the two Counters. Returns how many new bids were saved.
+    Raises sqlite3.Error if the save fails.
+    """
+    match_engine = matcher.get_matcher()
+    metrics.inc("cards_seen", len(cards))
+    # Known bids cost nothing beyond reading their ID
+    with metrics.span("dedup"):
+        fresh = [card for card in cards if not store.is_seen(card["bid_no"]) and card["bid_no"] not in claimed]
+
+    tenders = []
+    with metrics.span("parse"):
+        for card in fresh:
+            try:
+                record = card_parser.parse_card(card)
+            except card_parser.CardParseError as e:
+                parse_failures[str(e)] += 1
+                continue
+            if record.bid_no in claimed:
+                continue
+
+            match = match_engine.match(record.items)
+            if not match.keywords and not match.excluded:
+                if keyword not in config.SEARCH_KEYWORDS:
+                    # Broad query result that none of our keywords describe
+                    tally["unmatched"] += 1
+                    continue
+                # GeM matched text the card doesn't show (e.g. the full item list); trust its search
+                match = matcher.Match([keyword])
+            claimed.add(record.bid_no)
+            tenders.append(tender_from_record(record, keyword, match))
+    metrics.inc("cards_parsed", len(tenders))
+
+    # SKIP bids that only showed their ID after parsing, SAVE the rest in one transaction
+    # (minus any another worker saved first)
+    known = store.existing_bids(t["bid_no"] for t in tenders)
+    with metrics.span("persist"):
+        new_tenders = store.save_tenders([t for t in tenders if t["bid_no"] not in known])
+    metrics.inc("bids_new", len(new_tenders))
+
+    # ALERT: save_tenders queued the alerts with the bids (minus auto-ignored ones); wake the
+    # background sender and queue the documents
+    wanted = [t for t in new_tenders if t["status"] != "Ignored"]
+    with metrics.span("alert"):
+        alerts.get_dispatcher().notify()
+        downloads.get_downloader().enqueue(wanted)
+    metrics.inc("alerts_queued", len(wanted))
+    tally["auto_ignored"] += len(new_tenders) - len(wanted)
+    return len(new_tenders)
+
+def report_skipped(parse_failures, tally):
+    if tally["auto_ignored"]:
+        print(f"🙈 {tally['auto_ignored']} new bid(s) auto-ignored by exclusions or triage rules (saved, not alerted)")
+    if tally["unmatched"]:
+        print(f"🔍 {tally['unmatched']} broad-query result(s) matched no keyword and were dropped")
+
+    if parse_failures:
+        metrics.inc("cards_failed", sum(parse_failures.values()))
+        reasons = ", ".join(f"{reason} x{count}" for reason, count in parse_failures.most_common())
+        print(f"⚠️ {sum(parse_failures.values())} card(s) failed to parse: {reasons}")
+
+# --- CORE SCRAPING LOGIC ---
+def scrape_gem(fetcher=None, backfill=False, keywords=None):
+    """
+    One scrape cycle over `keywords` (default: every site query). Normally pages each
+    keyword newest-first only until it reaches bids we already have; backfill=True
+    ignores the watermarks and walks up to BACKFILL_MAX_PAGES pages.
+    Returns {keyword: new bids saved, or None if its search or save failed}.
+    """
+    print(f"[{datetime.now().strftime('%H:%M:%S')}] Starting {'backfill' if backfill else 'scrape'} cycle...")
+    new_bids_count = 0
+    parse_failures = Counter()
+    tally = Counter()  # auto_ignored / unmatched cards
+    error = None
+    metrics.REGISTRY.start_cycle()
+    fetcher = fetcher or fetchers.get_fetcher()
+    queries = keywords or site_queries()
+    outcomes = dict.fromkeys(queries)
 
-# --- DATABASE FUNCTIONS ---
-def bid_exists(bid_no):
-    """Checks if the bid is already in the database to avoid duplicate alerts."""
-    conn = sqlite3.connect("tenders.db")
-    cursor = conn.cursor()
-    cursor.execute("SELECT 1 FROM tenders WHERE bid_no = ?", (bid_no,))
-    exists = cursor.fetchone() is not None
-    conn.close()
-    return exists
-
-def save_tender_to_db(tender):
-    """Saves a new tender to the SQLite database with all details."""
-    conn = sqlite3.connect("tenders.db")
-    cursor = conn.cursor()
     try:
-        # Note: We use INSERT OR IGNORE to be safe, though bid_exists() checks first
-        cursor.execute('''
-            INSERT OR IGNORE INTO tenders 
-            (bid_no, title, items, department, start_date, end_date, link, status, found_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            tender['bid_no'], 
-            tender['title'], 
-            tender['items'], 
-            tender['department'], 
-            tender['start_date'],  # New Column
-            tender['end_date'], 
-            tender['link'], 
-            "New", 
-            datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        ))
-        conn.commit()
+        store = storage.get_store()
+        store.refresh_rules()
+
+        # --- KEYWORD SEARCH (direct HTTP, or a pool of browser pages) ---
+        # Keywords behind from last cycle page until they reach their watermark (up to the backfill depth)
+        old_watermarks = {} if backfill else store.get_watermarks()
+        behind = set() if backfill else store.get_behind() & set(queries)
+        stop_check = None if backfill else make_stop_check(store, old_watermarks, behind)
+        searches = [(queries, config.BACKFILL_MAX_PAGES)] if backfill else [
+            ([q for q in queries if q not in behind], config.MAX_PAGES),
+            ([q for q in queries if q in behind], config.BACKFILL_MAX_PAGES),
+        ]
+        results, timings, stops = {}, {}, {}
+        for batch, max_pages in searches:
+            if not batch:
+                continue
+            with metrics.span("fetch"):
+                batch_results, batch_timings, batch_stops = fetcher.search_keywords(batch, max_pages=max_pages, stop_check=stop_check)
+            results.update(batch_results)
+            timings.update(batch_timings)
+            stops.update(batch_stops)
+        browser.print_timings(timings)
+
+        claimed = set()
+        watermarks, lagging = {}, []
+        for keyword in queries:
+            try:
+                new_bids = process_cards(store, keyword, results.get(keyword, []), claimed, parse_failures, tally)
+            except sqlite3.Error as e:
+                metrics.inc("db_errors")
+                print(f"⚠️ DB Error saving '{keyword}' results: {e}")
+                continue  # Watermark stays put, so next cycle crawls these bids again
+            if keyword in results:
+                outcomes[keyword] = new_bids
+                # Newest bid at the top becomes next cycle's watermark, only once its cards are
+                # saved and the crawl got all the way back to bids we had
+                newest = newest_bid(results[keyword])
+                if fell_behind(keyword, stops.get(keyword), old_watermarks, behind):
+                    lagging.append(keyword)
+                elif newest:
+                    watermarks[keyword] = newest
+            new_bids_count += new_bids
+        report_skipped(parse_failures, tally)
+        store.save_watermarks(watermarks, lagging)
+
     except Exception as e:
-        print(f"⚠️ DB Error: {e}")
+        error = str(e)
+        print(f"❌ Error during scraping: {e}")
+
     finally:
-        conn.close()
-
-# --- DISCORD ALERT FUNCTION ---
-def send_discord_alert(tender):
-    embed = {
-        "title": f"📢 New Tender: {tender['title']}",
-        "description": f"**Item:** {tender['items']}",
-        "url": tender['link'],
-        "color": 3066993,  # Green Color
-        "fields": [
-            {"name": "🆔 Bid Number", "value": tender['bid_no'], "inline": True},
-            {"name": "🚀 Start Date", "value": tender['start_date'], "inline": True},
-            {"name": "⏳ End Date", "value": tender['end_date'], "inline": True},
-            {"name": "🏢 Department", "value": tender['department'], "inline": False}
-        ],
-        "footer": {"text": f"Found at {datetime.now().strftime('%H:%M')}"}
-    }
-    
-    payload = {"embeds": [embed]}
+        fetcher.close()
+        cycle = metrics.REGISTRY.finish_cycle(error)
+        try:
+            storage.get_store().record_cycle(cycle, fetcher.name, "backfill" if backfill else "scrape")
+        except sqlite3.Error as e:
+            print(f"⚠️ Could not record cycle history: {e}")
+        stages = ", ".join(f"{stage} {seconds:.1f}s" for stage, seconds in sorted(cycle["stages"].items(), key=lambda kv: -kv[1]))
+        print(f"✅ Cycle complete in {cycle['duration']:.1f}s via {fetcher.name}. New Bids: {new_bids_count}")
+        if stages:
+            print(f"⏱️ Stages: {stages}")
+    return outcomes
+
+# --- WORK-QUEUE MODE ---
+# python main.py --coordinator queues each keyword's check (page 1) as the adaptive
+# scheduler says it is due; python main.py --worker (any number, on any core) claims
+# pages, saves and queues alerts, then queues the keyword's next page until it is
+# caught up. Workers call the JSON endpoint directly: the browser backend can't jump
+# to page N. Alerts and downloads are delivered by the coordinator alone.
+def run_task(task, fetcher, store):
+    """
+    Fetches and saves one keyword page. Returns (new bids, next page to queue or None,
+    watermark to hand to that page). The round's last page saves the watermark, so a
+    round that fails half way, or runs out of pages before reaching known bids, is
+    crawled again from the old one.
+    """
+    store.refresh_seen()
+    store.refresh_rules()
+    with metrics.span("fetch"):
+        cards, total = fetcher.fetch_page(task.keyword, task.page)
+    old_watermarks = {} if task.backfill else store.get_watermarks()
+    behind = set() if task.backfill else store.get_behind()
+    caught_up = not task.backfill and make_stop_check(store, old_watermarks, behind)(task.keyword, cards)
+
+    parse_failures, tally = Counter(), Counter()
+    new_bids = process_cards(store, task.keyword, cards, set(), parse_failures, tally)
+    report_skipped(parse_failures, tally)
+
+    watermark = newest_bid(cards) if task.page == 1 else task.watermark
+    max_pages = config.BACKFILL_MAX_PAGES if task.backfill or task.keyword in behind else config.MAX_PAGES
+    if caught_up:
+        stop = browser.STOP_CAUGHT_UP
+    elif not cards or task.page * len(cards) >= total:
+        stop = browser.STOP_END
+    elif task.page >= max_pages:
+        stop = browser.STOP_PAGE_CAP
+    else:
+        return new_bids, task.page + 1, watermark
+
+    # Last page of the round: move the watermark only if the round got back to known bids
+    if fell_behind(task.keyword, stop, old_watermarks, behind):
+        store.save_watermarks({}, [task.keyword])
+    elif watermark:
+        store.save_watermarks({task.keyword: watermark})
+    return new_bids, None, watermark
+
+def run_worker(exit_when_idle=False):
+    """Claims and runs tasks until stopped (or, with exit_when_idle, until no task is left open)."""
+    owner = f"{socket.gethostname()}:{os.getpid()}"
+    queue = work_queue.get_queue()
+    store = storage.get_store()
+    fetcher = fetchers.HttpFetcher()
+    alerts.get_dispatcher(start=False)
+    downloads.get_downloader(start=False)
+    print(f"👷 Worker {owner} waiting for tasks ({queue.name} queue)")
+
     try:
-        requests.post(config.DISCORD_WEBHOOK_URL, json=payload)
-        print(f"✅ Alert sent for {tender['bid_no']}")
-    except Exception as e:
-        print(f"❌ Failed to send Discord alert: {e}")
+        while True:
+            task = queue.claim(owner)
+            if task is None:
+                if exit_when_idle and not queue.open_count():
+                    return
+                time.sleep(config.QUEUE_POLL_INTERVAL)
+                continue
 
-# --- CORE SCRAPING LOGIC ---
-def scrape_gem():
-    print(f"[{datetime.now().strftime('%H:%M:%S')}] Starting scrape cycle...")
-    new_bids_count = 0
+            try:
+                with queue.lease(task, owner), metrics.span("task"):
+                    new_bids, next_page, watermark = run_task(task, fetcher, store)
+            except Exception as e:
+                metrics.inc("tasks_failed")
+                print(f"⚠️ '{task.keyword}' page {task.page} failed (attempt {task.attempts}): {e}")
+                queue.fail(task, owner, str(e))
+                continue
 
-    with sync_playwright() as p:
-        # --- STEALTH LAUNCH (Bypasses Blocking) ---
-        browser = p.chromium.launch(
-            headless=True,
-            args=[
-                "--disable-blink-features=AutomationControlled", # Hides "I am a robot" flag
-                "--no-sandbox", 
-                "--disable-setuid-sandbox"
-            ]
-        )
-        
-        # Create a context that mimics a real user
-        context = browser.new_context(
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-            viewport={"width": 1920, "height": 1080},
-            ignore_https_errors=True
-        )
-        
-        # Javascript injection to hide WebDriver property
-        context.add_init_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-        
-        page = context.new_page()
+            if queue.complete(task, owner, new_bids, next_page, watermark):
+                metrics.inc("tasks_done")
+                print(f"[{datetime.now().strftime('%H:%M:%S')}] ✅ '{task.keyword}' page {task.page}: {new_bids} new")
+            else:
+                print(f"⚠️ '{task.keyword}' page {task.page} finished after its lease was taken over")
+    finally:
+        fetcher.close()
 
-        try:
-            # --- NAVIGATE TO PUBLIC BID LIST ---
-            target_url = "https://bidplus.gem.gov.in/all-bids"
-            print(f"🌍 Navigating to {target_url}...")
-            
-            # High timeout for slow government servers
-            page.goto(target_url, timeout=60000, wait_until="domcontentloaded")
-            
-            # Wait for card container to load
-            page.wait_for_selector(".card-body", timeout=20000)
-
-            # --- KEYWORD SEARCH LOOP ---
-            for keyword in config.SEARCH_KEYWORDS:
-                print(f"🔍 Searching for: {keyword}")
-                
-                try:
-                    # Select Search Box and Type
-                    search_input = 'input[type="search"]'
-                    page.wait_for_selector(search_input, state="visible", timeout=5000)
-                    
-                    page.fill(search_input, "")
-                    page.fill(search_input, keyword)
-                    page.press(search_input, "Enter")
-                    
-                    # Wait for results to refresh (adjust sleep if connection is slow)
-                    time.sleep(4) 
-                except Exception as e:
-                    print(f"⚠️ Search skipped for '{keyword}': {e}")
-                    continue
+def run_coordinator(backfill=False):
+    """Queues keyword checks and feeds finished rounds back into the adaptive scheduler."""
+    queue = work_queue.get_queue()
+    store = storage.get_store()
+    alerts.get_dispatcher()
+    downloads.get_downloader()
+    rounds = {}  # round_id -> keyword
+
+    if backfill:
+        for keyword in site_queries():
+            rounds[queue.enqueue(keyword, backfill=True)] = keyword
+        print(f"📋 Queued a backfill of {len(rounds)} keyword(s), waiting for the workers...")
+        while rounds:
+            for round_id, new_bids in queue.round_outcomes(list(rounds)).items():
+                keyword = rounds.pop(round_id)
+                print(f"   {'failed' if new_bids is None else f'{new_bids} new':>8}  {keyword}")
+            time.sleep(config.QUEUE_POLL_INTERVAL)
+        return
 
-                # Extract all cards currently visible
-                cards = page.query_selector_all(".card")
-                
-                for card in cards:
-                    try:
-                        full_text = card.inner_text()
-                        
-                        # 1. Extract BID NO
-                        bid_no = "Unknown"
-                        link = target_url
-                        
-                        # Find link (usually contains 'showbidDocument')
-                        link_elem = card.query_selector("a[href*='/showbidDocument']")
-                        if link_elem:
-                            link = "https://bidplus.gem.gov.in" + link_elem.get_attribute("href")
-                            bid_no = link_elem.inner_text().strip()
-                        elif "BID NO:" in full_text:
-                            # Fallback: Parse text if link is hidden
-                            lines = full_text.split('\n')
-                            for line in lines:
-                                if "GEM/" in line:
-                                    bid_no = line.strip()
-                                    break
-
-                        # SKIP if already in DB
-                        if bid_exists(bid_no):
-                            continue
-
-                        # 2. Extract Items
-                        items = "N/A"
-                        if "Items:" in full_text:
-                            parts = full_text.split("Items:")
-                            if len(parts) > 1:
-                                items = parts[1].split("Quantity:")[0].strip()
-
-                        # 3. Extract Dates (Start & End)
-                        start_date = "N/A"
-                        end_date = "N/A"
-                        
-                        if "Start Date:" in full_text:
-                            parts = full_text.split("Start Date:")
-                            if len(parts) > 1:
-                                temp = parts[1]
-                                start_date = temp.split("End Date:")[0].strip()
-                                # Clean up formatting
-                                start_date = start_date.replace("\n", "").strip()
-
-                        if "End Date:" in full_text:
-                            parts = full_text.split("End Date:")
-                            if len(parts) > 1:
-                                end_date = parts[1].split("\n")[0].strip()
-
-                        # 4. Extract Department
-                        department = "Unknown"
-                        if "Department Name And Address:" in full_text:
-                            parts = full_text.split("Department Name And Address:")
-                            if len(parts) > 1:
-                                department = parts[1].split("\n")[1].strip()
-
-                        # Construct Data Object
-                        tender_data = {
-                            "bid_no": bid_no,
-                            "title": keyword,  # Using the matched keyword as title tag
-                            "items": items[:150], # Truncate long item lists
-                            "start_date": start_date,
-                            "end_date": end_date,
-                            "department": department,
-                            "link": link
-                        }
-
-                        # SAVE & ALERT
-                        save_tender_to_db(tender_data)
-                        send_discord_alert(tender_data)
-                        new_bids_count += 1
-                        
-                    except Exception as e:
-                        # print(f"Card parse error: {e}") # Uncomment for debugging
-                        continue
-                
-                # Polite pause between keywords
-                time.sleep(2)
-
-        except Exception as e:
-            print(f"❌ Error during scraping: {e}")
-
-        finally:
-            browser.close()
-            print(f"✅ Cycle complete. New Bids: {new_bids_count}")
+    polling = scheduler.AdaptiveScheduler(site_queries(), store)
+    print(f"📋 Coordinating {len(polling.states)} keyword(s) through the {queue.name} queue")
+    while True:
+        for keyword in polling.due():
+            if keyword not in rounds.values():
+                rounds[queue.enqueue(keyword)] = keyword
+        finished = queue.round_outcomes(list(rounds))
+        if finished:
+            polling.record({rounds.pop(round_id): new_bids for round_id, new_bids in finished.items()})
+            polling.print_summary()
+            queue.prune(time.time() - config.QUEUE_KEEP_HOURS * 3600)
+        cold_tier.compact_if_due()
+        time.sleep(config.QUEUE_POLL_INTERVAL)
 
 # --- SCHEDULER ---
 if __name__ == "__main__":
     print("🤖 GeM Scraper Bot Initialized.")
-    
-    # Run once immediately on startup to test
-    scrape_gem()
-    
-    # Schedule runs based on config
-    schedule.every(config.CHECK_INTERVAL).minutes.do(scrape_gem)
-    
+    create_db.init_db()  # Safe when several processes start at once (see create_db.migrate)
+
+    # Work-queue mode: one coordinator plus any number of workers
+    if "--worker" in sys.argv:
+        # Every worker exports its own counters, on the first free port above METRICS_PORT
+        if config.METRICS_PORT:
+            metrics.serve(config.METRICS_PORT + 1, tries=config.METRICS_WORKER_PORTS)
+        run_worker()
+        sys.exit(0)
+
+    metrics.serve()
+    if "--coordinator" in sys.argv:
+        run_coordinator(backfill="--backfill" in sys.argv)
+        sys.exit(0)
+
+    # One-off deep crawl: python main.py --backfill
+    if "--backfill" in sys.argv:
+        scrape_gem(backfill=True)
+        sys.exit(0)
+
+    # Each keyword runs on its own adaptive interval; keywords falling due together share a cycle
+    # (new keywords are due immediately, so the first cycle still runs on startup)
+    polling = scheduler.AdaptiveScheduler(site_queries(), storage.get_store())
     while True:
-        schedule.run_pending()
-        time.sleep(1)
\ No newline at end of file
+        due = polling.due()
+        if due:
+            polling.record(scrape_gem(keywords=due))
+            polling.print_summary()
+        cold_tier.compact_if_due()
+        time.sleep(max(1, min(60, polling.seconds_until_next())))
\ No newline at end of file
@@ -0,0 +1,89 @@
+import re
+from dataclasses import dataclass, field
+import config
+
+# --- LOCAL KEYWORD MATCHING ---
+# Every parsed card is scored against all keywords, their synonyms and the exclusion
+# terms in one pass over its words. Terms are whole-word phrases held in a word trie
+# (Aho-Corasick over words instead of characters), so overlapping keywords like
+# "blinds" and "roller blinds" both match the same card.
+
+WORD_RE = re.compile(r"\w+")
+EXCLUDED = object()  # Trie payload marking an exclusion term
+
+def words(text):
+    return WORD_RE.findall((text or "").lower())
+
+@dataclass
+class Match:
+    keywords: list = field(default_factory=list)  # Matched keywords, in config order
+    score: int = 0                                  # Keyword hits (exact 2, synonym 1), 0 if excluded
+    excluded: bool = False
+
+    @property
+    def primary(self):
+        return self.keywords[0] if self.keywords else None
+
+class Matcher:
+    def __init__(self, keywords, synonyms=None, exclusions=None):
+        self.keywords = list(keywords)
+        self.order = {keyword: i for i, keyword in enumerate(self.keywords)}
+        self.trie = {}
+        self.max_len = 0
+        for keyword in self.keywords:
+            self._add(keyword, (keyword, 2))
+            for synonym in (synonyms or {}).get(keyword, []):
+                self._add(synonym, (keyword, 1))
+        for term in exclusions or []:
+            self._add(term, EXCLUDED)
+
+    def _add(self, phrase, payload):
+        tokens = words(phrase)
+        if not tokens:
+            return
+        node = self.trie
+        for token in tokens:
+            node = node.setdefault(token, {})
+        node.setdefault(None, []).append(payload)
+        self.max_len = max(self.max_len, len(tokens))
+
+    def match(self, text):
+        """Scores one card's text. Excluded cards come back with excluded=True and score 0."""
+        tokens = words(text)
+        hits = {}
+        for start in range(len(tokens)):
+            node = self.trie
+            for token in tokens[start:start + self.max_len]:
+                node = node.get(token)
+                if node is None:
+                    break
+                for payload in node.get(None, ()):
+                    if payload is EXCLUDED:
+                        return Match(excluded=True)
+                    keyword, weight = payload
+                    hits[keyword] = max(hits.get(keyword, 0), weight)
+        return Match(sorted(hits, key=self.order.get), sum(hits.values()))
+
+def _contains(tokens, phrase):
+    return any(tokens[i:i + len(phrase)] == phrase for i in range(len(tokens) - len(phrase) + 1))
+
+def site_queries(keywords):
+    """
+    The searches actually sent to GeM: a keyword is dropped when a shorter keyword's
+    words already appear in it (the site search for "blinds" returns "roller blinds"
+    bids too, and the local matcher still tags them with both).
+    """
+    phrases = {keyword: words(keyword) for keyword in keywords}
+    return [
+        keyword for keyword, tokens in phrases.items()
+        if not any(0 < len(other) < len(tokens) and _contains(tokens, other) for other in phrases.values())
+    ]
+
+_matcher = None
+
+def get_matcher():
+    """The Matcher for the configured keywords, synonyms and exclusions."""
+    global _matcher
+    if _matcher is None:
+        _matcher = Matcher(config.SEARCH_KEYWORDS, config.KEYWORD_SYNONYMS, config.EXCLUDE_TERMS)
+    return _matcher
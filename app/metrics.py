@@ -0,0 +1,151 @@
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import config
+
+# --- SCRAPER METRICS ---
+# Timing spans per stage and plain counters, kept in memory for the whole process.
+# They are served in Prometheus text format on METRICS_PORT, and each scrape cycle's
+# share of them is written to the scrape_cycles table by the scraper.
+
+PREFIX = "gem_"
+STAGE_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+class Metrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {}    # (name, labels) -> value
+        self.histograms = {}  # (stage, labels) -> [bucket counts..., sum, count]
+        self.gauges = {}      # name -> value
+        self.cycle = None     # Totals for the cycle in progress
+
+    # --- recording ---
+    def inc(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+            if self.cycle is not None:
+                self.cycle["counts"][name] = self.cycle["counts"].get(name, 0) + amount
+
+    def observe(self, stage, seconds, **labels):
+        key = (stage, tuple(sorted(labels.items())))
+        with self.lock:
+            entry = self.histograms.setdefault(key, [0] * len(STAGE_BUCKETS) + [0.0, 0])
+            for i, bound in enumerate(STAGE_BUCKETS):
+                if seconds <= bound:
+                    entry[i] += 1
+            entry[-2] += seconds
+            entry[-1] += 1
+            if self.cycle is not None:
+                self.cycle["stages"][stage] = self.cycle["stages"].get(stage, 0) + seconds
+
+    def set_gauge(self, name, value):
+        with self.lock:
+            self.gauges[name] = value
+
+    @contextmanager
+    def span(self, stage, **labels):
+        """Times the block as one observation of `stage` (also when it raises)."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - started, **labels)
+
+    # --- cycles ---
+    def start_cycle(self):
+        with self.lock:
+            self.cycle = {
+                "started_at": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                "started": time.perf_counter(),
+                "stages": {},
+                "counts": {}
+            }
+
+    def finish_cycle(self, error=None):
+        """Closes the cycle in progress. Returns its totals (stages in seconds, summed across workers)."""
+        with self.lock:
+            cycle, self.cycle = self.cycle, None
+        if cycle is None:
+            return None
+        cycle["duration"] = time.perf_counter() - cycle.pop("started")
+        cycle["error"] = error
+        self.observe("cycle", cycle["duration"])
+        self.inc("cycles", result="error" if error else "ok")
+        self.set_gauge("last_cycle_timestamp_seconds", time.time())
+        return cycle
+
+    # --- exposition ---
+    def render(self):
+        """Everything recorded so far in the Prometheus text format."""
+        lines = []
+        with self.lock:
+            for name in sorted({name for name, _ in self.counters}):
+                lines.append(f"# TYPE {PREFIX}{name}_total counter")
+                for (key_name, labels), value in sorted(self.counters.items()):
+                    if key_name == name:
+                        lines.append(f"{PREFIX}{name}_total{_labels(labels)} {value}")
+
+            lines.append(f"# TYPE {PREFIX}stage_seconds histogram")
+            for (stage, labels), entry in sorted(self.histograms.items()):
+                labels = (("stage", stage),) + labels
+                for bound, count in zip(STAGE_BUCKETS, entry):
+                    lines.append(f"{PREFIX}stage_seconds_bucket{_labels(labels + (('le', bound),))} {count}")
+                lines.append(f"{PREFIX}stage_seconds_bucket{_labels(labels + (('le', '+Inf'),))} {entry[-1]}")
+                lines.append(f"{PREFIX}stage_seconds_sum{_labels(labels)} {entry[-2]:.6f}")
+                lines.append(f"{PREFIX}stage_seconds_count{_labels(labels)} {entry[-1]}")
+
+            for name, value in sorted(self.gauges.items()):
+                lines.append(f"# TYPE {PREFIX}{name} gauge")
+                lines.append(f"{PREFIX}{name} {value}")
+        return "\n".join(lines) + "\n"
+
+def _labels(labels):
+    if not labels:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"') for _, value in labels)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + "}"
+
+# --- PROCESS-WIDE REGISTRY ---
+REGISTRY = Metrics()
+inc = REGISTRY.inc
+observe = REGISTRY.observe
+span = REGISTRY.span
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path != "/metrics":
+            self.send_error(404)
+            return
+        body = REGISTRY.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass  # Keep scrapes of /metrics out of the bot's console
+
+def serve(port=None, tries=1):
+    """
+    Serves /metrics on localhost from a daemon thread, on the first free port of
+    port .. port + tries - 1. Returns the server (None if disabled or nothing was free).
+    """
+    port = config.METRICS_PORT if port is None else port
+    if not port:
+        return None
+    for candidate in range(port, port + tries):
+        try:
+            server = ThreadingHTTPServer(("127.0.0.1", candidate), _MetricsHandler)
+            break
+        except OSError as e:
+            error = e
+    else:
+        print(f"⚠️ Metrics endpoint not started on port {port}" + (f"-{port + tries - 1}" if tries > 1 else "") + f": {error}")
+        return None
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    print(f"📈 Metrics on http://127.0.0.1:{server.server_port}/metrics")
+    return server
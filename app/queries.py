@@ -0,0 +1,77 @@
+import re
+from datetime import datetime
+import pandas as pd
+
+# --- DASHBOARD QUERY LAYER ---
+# Every tab view becomes one parameterized query: filter, search and page in SQL,
+# so the dashboard only ever pulls the rows it is about to show.
+
+TAB_STATUS = {"Live": "New", "Bookmarked": "Bookmarked", "Ignored": "Ignored"}
+ORDER_BY = "ORDER BY tenders.found_at DESC, tenders.bid_no DESC"
+
+# Search goes through the tenders_fts index (migration 3); LIKE over these columns is the fallback
+SEARCH_COLUMNS = ("bid_no", "items", "department", "title")
+FTS_RANK = "bm25(tenders_fts, 10.0, 4.0, 2.0, 1.0)"  # bid_no > items > department > title
+FTS_SNIPPET = "snippet(tenders_fts, -1, '<mark>', '</mark>', '…', 12)"
+
+QUERY_TOKEN_RE = re.compile(r'"([^"]*)"|(\S+)')
+WORD_RE = re.compile(r"\w+")
+
+def _escape_like(text):
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+def search_terms(text):
+    """Search box text -> [(words, is_prefix)]: "quoted words" are exact, everything else a prefix."""
+    terms = []
+    for phrase, word in QUERY_TOKEN_RE.findall(text or ""):
+        words = WORD_RE.findall(phrase or word)
+        if words:
+            terms.append((words, not phrase))
+    return terms
+
+def to_fts_query(text):
+    """
+    Search box text -> FTS5 MATCH expression, all terms ANDed.
+    "quoted words" stay an exact phrase; every other word is a prefix match, and
+    ids like GEM/2025/B/70 become the prefix phrase "GEM 2025 B 70"*.
+    """
+    return " AND ".join(f'"{" ".join(words)}"' + ("*" if prefix else "") for words, prefix in search_terms(text))
+
+def has_fts(conn):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'tenders_fts'").fetchone() is not None
+
+def build_where(tab, now=None):
+    """Returns (clauses, params) selecting one tab's rows."""
+    now = now or datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    if tab == "Expired":
+        return ["tenders.end_at < ?"], [now]
+    # Unreadable end dates never expire
+    return ["tenders.status = ?", "(tenders.end_at >= ? OR tenders.end_at IS NULL)"], [TAB_STATUS.get(tab, "New"), now]
+
+def build_query(conn, tab, search=None):
+    """Returns (select, from_where, order_by, params) for a tab plus the search box."""
+    clauses, params = build_where(tab)
+    match = to_fts_query(search)
+
+    if match and has_fts(conn):
+        clauses.append("tenders_fts MATCH ?")
+        params.append(match)
+        # CROSS JOIN pins the FTS index as the outer loop; otherwise SQLite may run MATCH once per tab row
+        source = "tenders_fts CROSS JOIN tenders ON tenders.rowid = tenders_fts.rowid"
+        return f"tenders.*, {FTS_SNIPPET} AS snippet", f"FROM {source} WHERE {' AND '.join(clauses)}", f"ORDER BY {FTS_RANK}, tenders.found_at DESC", params
+
+    if search and search.strip():
+        pattern = f"%{_escape_like(search.strip())}%"
+        clauses.append("(" + " OR ".join(f"tenders.{column} LIKE ? ESCAPE '\\'" for column in SEARCH_COLUMNS) + ")")
+        params.extend([pattern] * len(SEARCH_COLUMNS))
+    return "tenders.*", f"FROM tenders WHERE {' AND '.join(clauses)}", ORDER_BY, params
+
+def count_tab(conn, tab, search=None):
+    _, from_where, _, params = build_query(conn, tab, search)
+    return conn.execute(f"SELECT COUNT(*) {from_where}", params).fetchone()[0]
+
+def fetch_tab(conn, tab, search=None, limit=50, offset=0):
+    """One page of a tab as a DataFrame: newest first, or best match first when searching."""
+    select, from_where, order_by, params = build_query(conn, tab, search)
+    query = f"SELECT {select} {from_where} {order_by} LIMIT ? OFFSET ?"
+    return pd.read_sql(query, conn, params=params + [limit, offset])
@@ -0,0 +1,101 @@
+import random
+import time
+from dataclasses import dataclass, asdict
+from datetime import datetime
+import config
+
+# --- ADAPTIVE POLLING ---
+# Each site query gets its own check interval instead of one CHECK_INTERVAL for all.
+# The interval aims for about TARGET_NEW_PER_CHECK new bids per check, based on a
+# smoothed rate of new bids per hour, so busy keywords are checked often and quiet
+# ones drift towards MAX_CHECK_INTERVAL. Failures back off exponentially from
+# MIN_CHECK_INTERVAL, keywords whose checks fail now and then are checked less eagerly
+# (up to twice the interval at a 100% smoothed error rate), outside BUSINESS_HOURS
+# everything slows down, and every interval gets some jitter so checks don't line up.
+
+SMOOTHING = 0.3  # Weight of the latest check in the moving averages
+
+@dataclass
+class KeywordState:
+    keyword: str
+    interval: float           # Minutes until the next check
+    next_due: float           # Epoch seconds
+    new_rate: float = None    # Smoothed new bids per hour (None until the first check)
+    error_rate: float = 0.0   # Smoothed share of failed checks
+    failures: int = 0         # Failures in a row
+    last_checked: float = None
+
+def in_business_hours(now):
+    moment = datetime.fromtimestamp(now)
+    start, end = config.BUSINESS_HOURS
+    return moment.weekday() < 5 and start <= moment.hour < end
+
+class AdaptiveScheduler:
+    def __init__(self, keywords, store, rng=None):
+        self.store = store
+        self.rng = rng or random.Random()
+        saved = store.get_schedule()
+        now = time.time()
+        # New keywords are due straight away; known ones keep their place across restarts
+        self.states = {
+            keyword: KeywordState(**saved[keyword]) if keyword in saved
+            else KeywordState(keyword, config.CHECK_INTERVAL, now)
+            for keyword in keywords
+        }
+
+    def due(self, horizon=60):
+        """Keywords due now or within `horizon` seconds (batched into one cycle)."""
+        cutoff = time.time() + horizon
+        return [s.keyword for s in sorted(self.states.values(), key=lambda s: s.next_due) if s.next_due <= cutoff]
+
+    def seconds_until_next(self):
+        return max(0, min(s.next_due for s in self.states.values()) - time.time())
+
+    def record(self, outcomes, now=None):
+        """
+        Takes scrape_gem's {keyword: new bids, or None if the check failed} and
+        schedules each keyword's next check.
+        """
+        now = now or time.time()
+        for keyword, new_bids in outcomes.items():
+            state = self.states.get(keyword)
+            if state is None:
+                continue
+            failed = new_bids is None
+            state.error_rate = SMOOTHING * failed + (1 - SMOOTHING) * state.error_rate
+
+            if failed:
+                state.failures += 1
+                state.interval = min(config.MAX_CHECK_INTERVAL, config.MIN_CHECK_INTERVAL * 2 ** (state.failures - 1))
+            else:
+                hours = (now - state.last_checked) / 3600 if state.last_checked else state.interval / 60
+                rate = new_bids / max(hours, 1 / 60)
+                state.new_rate = rate if state.new_rate is None else SMOOTHING * rate + (1 - SMOOTHING) * state.new_rate
+                state.failures = 0
+                state.last_checked = now
+                state.interval = self._interval_for(state, now)
+
+            jitter = 1 + self.rng.uniform(-config.SCHEDULE_JITTER, config.SCHEDULE_JITTER)
+            state.next_due = now + state.interval * 60 * jitter
+        self.store.save_schedule([asdict(s) for s in self.states.values()])
+
+    def _interval_for(self, state, now):
+        """Minutes until the next check after a successful one."""
+        if state.new_rate:
+            interval = config.TARGET_NEW_PER_CHECK / state.new_rate * 60
+        else:
+            interval = config.MAX_CHECK_INTERVAL
+        interval *= 1 + state.error_rate
+        if not in_business_hours(now):
+            interval *= config.OFF_HOURS_SLOWDOWN
+        # Intervals grow gradually, at most doubling per check (also at the start of off-hours)
+        interval = min(interval, state.interval * 2)
+        return max(config.MIN_CHECK_INTERVAL, min(config.MAX_CHECK_INTERVAL, interval))
+
+    def print_summary(self):
+        print("🗓️ Next checks:")
+        now = time.time()
+        for s in sorted(self.states.values(), key=lambda s: s.next_due):
+            rate = "—" if s.new_rate is None else f"{s.new_rate:.2f}/h"
+            backoff = f", {s.failures} failure(s)" if s.failures else ""
+            print(f"   in {max(0, s.next_due - now) / 60:5.1f} min  every {s.interval:5.1f} min  {rate:>8}{backoff}  {s.keyword}")
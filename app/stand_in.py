@@ -0,0 +1,284 @@
+"""
+Local stand-in for bidplus.gem.gov.in, for offline benchmarks and testing.
+
+Serves the pieces the scraper touches: the all-bids page (CSRF token, search box,
+cards, pagination, enough JS for the browser backend, plus static assets with
+ETags), the /all-bids-data JSON endpoint, bid documents and a Discord-style webhook. Results come from a synthetic
+dataset or from recorded all-bids-data docs, with optional latency and error injection. The webhook answers
+204 unless given a script of responses (webhook_script) or a title that gets embeds rejected (webhook_reject).
+
+    python stand_in.py [--port 8765] [--total 1000] [--latency 0.2] [--error-rate 0.05] [--fixtures docs.json]
+    GEM_BASE_URL=http://127.0.0.1:8765 python main.py
+"""
+import argparse
+import hashlib
+import html
+import json
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+import fetchers
+
+TOKEN = "stand-in-token"
+PAGE_SIZE = 10
+
+ITEMS = ["Roller Blinds", "Vertical Blinds", "Window Curtains", "Vinyl Sticker", "Name Plate", "Name Board",
+         "Reflector", "Lamination Film", "Netlon Mesh", "LED Stand", "Neon Sign", "LED Board", "Office Chair",
+         "Printer Cartridge", "Desktop Computer", "Steel Almirah", "Water Cooler", "Fire Extinguisher"]
+DEPARTMENTS = ["Ministry of Defence", "Ministry of Railways", "Ministry of Home Affairs", "Ministry of Education",
+               "Ministry of Health and Family Welfare", "State Government of Kerala", "Ministry of Culture"]
+
+# --- DATASET ---
+def synthetic_docs(total, seed=7):
+    """all-bids-data style docs (Solr single-value lists), newest bid first."""
+    rng = random.Random(seed)
+    now = datetime.now().replace(microsecond=0)
+    docs = []
+    for i in range(total, 0, -1):
+        start = now - timedelta(hours=total - i)
+        docs.append({
+            "b_id": [8000000 + i],
+            "b_bid_number": [f"GEM/{start.year}/B/{8000000 + i}"],
+            "b_category_name": [", ".join(rng.sample(ITEMS, rng.randint(1, 3)))],
+            "final_start_date_sort": [start.strftime("%Y-%m-%dT%H:%M:%SZ")],
+            "final_end_date_sort": [(start + timedelta(days=rng.randint(7, 30))).strftime("%Y-%m-%dT%H:%M:%SZ")],
+            "ba_official_details_minName": [rng.choice(DEPARTMENTS)],
+        })
+    return docs
+
+def _value(doc, key):
+    value = doc.get(key)
+    return (value[0] if value else "") if isinstance(value, list) else (value or "")
+
+class StandInGeM:
+    """The fake site's state: dataset, fault injection settings and request counters."""
+
+    def __init__(self, total=1000, docs=None, latency=0.0, error_rate=0.0, page_size=PAGE_SIZE, seed=7,
+                 webhook_script=None, webhook_reject=None):
+        self.docs = docs if docs is not None else synthetic_docs(total, seed)
+        # (status, headers) answers for the next webhook posts, then 204s; any message with an
+        # embed title containing webhook_reject gets a 400
+        self.webhook_script = list(webhook_script or [])
+        self.webhook_reject = webhook_reject
+        self.webhook_log = []  # (time, status, [bid numbers]) per webhook post
+        self.latency = latency
+        self.error_rate = error_rate
+        self.page_size = page_size
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.counts = {}
+        self.matches = {}  # keyword -> matching docs
+        self.server = None
+
+    def count(self, what, amount=1):
+        with self.lock:
+            self.counts[what] = self.counts.get(what, 0) + amount
+
+    def search(self, keyword, page_no):
+        """(docs on the page, total matches): every word of the keyword in the item list."""
+        key = keyword.lower().strip()
+        with self.lock:
+            matches = self.matches.get(key)
+        if matches is None:
+            words = key.split()
+            matches = [doc for doc in self.docs if all(w in _value(doc, "b_category_name").lower() for w in words)]
+            with self.lock:
+                self.matches[key] = matches
+        start = (max(1, page_no) - 1) * self.page_size
+        return matches[start:start + self.page_size], len(matches)
+
+    def webhook_answer(self, embeds):
+        """(status, headers) for one webhook post, logged with the bid numbers it carried."""
+        bids = [field["value"] for embed in embeds for field in embed.get("fields", []) if field["name"].endswith("Bid Number")]
+        with self.lock:
+            if self.webhook_script:
+                status, headers = self.webhook_script.pop(0)
+            elif self.webhook_reject and any(self.webhook_reject in embed.get("title", "") for embed in embeds):
+                status, headers = 400, {}
+            else:
+                status, headers = 204, {}
+            self.webhook_log.append((time.time(), status, bids))
+        return status, headers
+
+    def should_fail(self):
+        with self.lock:
+            return self.rng.random() < self.error_rate
+
+    # --- lifecycle ---
+    def start(self, port=0):
+        """Serves from a daemon thread. Returns the base URL."""
+        handler = type("Handler", (_Handler,), {"site": self})
+        self.server = _Server(("127.0.0.1", port), handler)
+        threading.Thread(target=self.server.serve_forever, name="stand-in", daemon=True).start()
+        return f"http://127.0.0.1:{self.server.server_port}"
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+
+# --- HTML ---
+def card_html(doc):
+    """One result card laid out like the real listing (innerText is what card_parser reads)."""
+    fmt = lambda key: fetchers._format_date(_value(doc, key))
+    return f"""<div class="card"><div class="card-body">
+<div>BID NO: <a href="/showbidDocument/{_value(doc, 'b_id')}">{html.escape(str(_value(doc, 'b_bid_number')))}</a></div>
+<div>Items: {html.escape(str(_value(doc, 'b_category_name')))}</div>
+<div>Quantity: 1</div>
+<div>Department Name And Address:</div><div>{html.escape(str(_value(doc, 'ba_official_details_minName')))}</div>
+<div>Start Date: {fmt('final_start_date_sort')}</div>
+<div>End Date: {fmt('final_end_date_sort')}</div>
+</div></div>"""
+
+PAGE_JS = """
+let page = 1, keyword = "";
+async function load() {
+    const body = new URLSearchParams();
+    body.set("payload", JSON.stringify({page: page, param: {searchBid: keyword, searchType: "fullText"}}));
+    body.set("csrf_bd_gem_nk", document.querySelector("input[name=csrf_bd_gem_nk]").value);
+    const response = await fetch("/all-bids-data", {method: "POST", body: body});
+    const data = await response.json();
+    document.getElementById("bids").innerHTML = data.html;
+    document.querySelector("#light-pagination a.next").setAttribute("aria-disabled", data.last ? "true" : "false");
+}
+document.querySelector("input[type=search]").addEventListener("keydown", e => {
+    if (e.key === "Enter") { keyword = e.target.value; page = 1; load(); }
+});
+document.querySelector("#light-pagination a.next").addEventListener("click", e => {
+    e.preventDefault(); page += 1; load();
+});
+"""
+
+# Static assets roughly the weight of the real page's, revalidated on every load (no-cache + ETag)
+STATIC = {
+    "/static/app.js": ("application/javascript", PAGE_JS.encode() + b"\n//" + b"=" * 300_000 + b"\n"),
+    "/static/site.css": ("text/css", b"@font-face { font-family: gem; src: url(/static/font.woff2); }\n"
+                                     b"body { font-family: gem, sans-serif; }\n/*" + b"=" * 150_000 + b"*/\n"),
+    "/static/font.woff2": ("font/woff2", bytes(100_000)),
+    "/static/logo.png": ("image/png", bytes(200_000)),
+}
+STATIC_ETAGS = {path: '"' + hashlib.sha1(body).hexdigest()[:16] + '"' for path, (_, body) in STATIC.items()}
+
+def all_bids_page(site):
+    docs, total = site.search("", 1)
+    return f"""<!doctype html><html><head><title>All Bids (stand-in)</title><link rel="stylesheet" href="/static/site.css"></head><body>
+<img src="/static/logo.png" alt="GeM">
+<form><input type="hidden" name="csrf_bd_gem_nk" value="{TOKEN}"></form>
+<input type="search" placeholder="Search">
+<div id="bids">{''.join(card_html(doc) for doc in docs)}</div>
+<div id="light-pagination"><a class="next" href="#" aria-disabled="{'true' if total <= site.page_size else 'false'}">Next</a></div>
+<script src="/static/app.js"></script>
+</body></html>"""
+
+# --- HTTP ---
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients hanging up mid-response (e.g. a benchmark child exiting) are expected
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+class _Handler(BaseHTTPRequestHandler):
+    site = None
+    protocol_version = "HTTP/1.1"  # Keep-alive, like the real site
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body=b"", content_type="text/html; charset=utf-8", headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+        self.site.count("bytes", len(body))
+
+    def do_GET(self):
+        time.sleep(self.site.latency)
+        if self.path.startswith("/all-bids"):
+            self.site.count("page")
+            self._send(200, all_bids_page(self.site).encode(),
+                       headers={"Set-Cookie": f"{fetchers.CSRF_COOKIE}={TOKEN}; Path=/"})
+        elif self.path in STATIC:
+            self.site.count("static")
+            etag = STATIC_ETAGS[self.path]
+            if self.headers.get("If-None-Match") == etag:
+                self.site.count("not_modified")
+                self._send(304, headers={"ETag": etag})
+                return
+            content_type, body = STATIC[self.path]
+            self._send(200, body, content_type, headers={"ETag": etag, "Cache-Control": "no-cache"})
+        elif self.path.startswith("/showbidDocument/"):
+            self.site.count("document")
+            self._send(200, b"%PDF-1.4\n% stand-in bid document " + self.path.encode() + b"\n%%EOF\n", "application/pdf")
+        else:
+            self._send(404, b"not found")
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        time.sleep(self.site.latency)
+        if self.path.startswith("/webhook"):
+            self.site.count("webhook")
+            status, headers = self.site.webhook_answer(json.loads(body or b"{}").get("embeds", []))
+            if status == 429:
+                retry_after = float(headers.get("Retry-After", 1))
+                self._send(429, json.dumps({"retry_after": retry_after}).encode(), "application/json", headers)
+            elif status == 400:
+                self._send(400, b'{"code": 50035, "message": "Invalid Form Body"}', "application/json", headers)
+            else:
+                self._send(status, headers=headers)
+            return
+        if not self.path.startswith("/all-bids-data"):
+            self._send(404, b"not found")
+            return
+
+        self.site.count("search")
+        if self.site.should_fail():
+            self.site.count("injected_error")
+            self._send(500, b"injected error")
+            return
+
+        form = parse_qs(body.decode())
+        if form.get(fetchers.CSRF_FIELD, [""])[0] != TOKEN:
+            self._send(419, b"csrf token mismatch")
+            return
+        payload = json.loads(form.get("payload", ["{}"])[0])
+        keyword = payload.get("param", {}).get("searchBid", "")
+        page_no = int(payload.get("page", 1))
+        docs, total = self.site.search(keyword, page_no)
+        result = {
+            "response": {"response": {"numFound": total, "docs": docs}},
+            # Pre-rendered cards for the stand-in page's own JS (the browser backend)
+            "html": "".join(card_html(doc) for doc in docs),
+            "last": page_no * self.site.page_size >= total,
+        }
+        self._send(200, json.dumps(result).encode(), "application/json")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--total", type=int, default=1000, help="synthetic bids to serve")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of searches answered with HTTP 500")
+    parser.add_argument("--fixtures", help="JSON list of recorded all-bids-data docs to serve instead")
+    args = parser.parse_args()
+
+    docs = None
+    if args.fixtures:
+        with open(args.fixtures) as f:
+            docs = json.load(f)
+    site = StandInGeM(total=args.total, docs=docs, latency=args.latency, error_rate=args.error_rate)
+    site.start(args.port)
+    print(f"🏛️ GeM stand-in serving {len(site.docs)} bid(s) on http://127.0.0.1:{args.port}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        site.stop()
@@ -0,0 +1,185 @@
+import atexit
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+import config
+import alerts
+import card_parser
+import triage
+
+# SQLite caps the number of ? placeholders per statement, stay well below it
+IN_CHUNK = 500
+
+class TenderStore:
+    """
+    The scraper's single long-lived SQLite connection, in WAL mode so the
+    dashboard can keep reading while we write. All access goes through one lock
+    because the HTTP backend calls us from its worker threads. Dedup runs
+    against an in-memory set of seen bid numbers, so known bids never hit the DB.
+    """
+
+    def __init__(self, db_file=None):
+        self.conn = sqlite3.connect(db_file or config.DB_FILE, check_same_thread=False, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")  # Safe with WAL, one fsync per checkpoint
+        self.lock = threading.Lock()
+        self.seen = self._load_seen_index()
+        self.rules = []
+
+    # --- SEEN-BID INDEX ---
+    def _migrate_history_file(self):
+        """One-off import of the old seen_bids.json history into legacy_seen_bids."""
+        path = config.HISTORY_FILE
+        if not os.path.exists(path):
+            return
+        with open(path) as f:
+            bid_nos = [bid_no for bid_no in json.load(f) if bid_no and bid_no != "Unknown"]
+        with self.conn:
+            self.conn.executemany("INSERT OR IGNORE INTO legacy_seen_bids (bid_no) VALUES (?)", [(b,) for b in bid_nos])
+        os.replace(path, path + ".migrated")
+        print(f"📦 Migrated {len(bid_nos)} bid(s) from {path} into the seen index")
+
+    def _load_seen_index(self):
+        """Every bid we have ever stored or alerted on, loaded once at startup."""
+        self._migrate_history_file()
+        rows = self.conn.execute("SELECT bid_no FROM tenders UNION SELECT bid_no FROM legacy_seen_bids")
+        seen = {row[0] for row in rows}
+        self.seen_rowid = self.conn.execute("SELECT COALESCE(MAX(rowid), 0) FROM tenders").fetchone()[0]
+        print(f"🧠 Seen index loaded: {len(seen)} bid(s)")
+        return seen
+
+    def refresh_seen(self):
+        """Adds bids other processes saved since the last refresh (work-queue workers share the DB)."""
+        with self.lock:
+            rows = self.conn.execute("SELECT rowid, bid_no FROM tenders WHERE rowid > ?", (self.seen_rowid,)).fetchall()
+        for rowid, bid_no in rows:
+            self.seen.add(bid_no)
+            self.seen_rowid = max(self.seen_rowid, rowid)
+        return len(rows)
+
+    def is_seen(self, bid_no):
+        return bid_no in self.seen
+
+    # --- TENDERS ---
+    def existing_bids(self, bid_nos):
+        """Returns the subset of bid_nos we have already seen (memory only, no query)."""
+        return {bid_no for bid_no in bid_nos if bid_no in self.seen}
+
+    def refresh_rules(self):
+        """Reloads the auto-triage rules (edited from the dashboard). Called once per cycle."""
+        with self.lock:
+            self.rules = triage.load_rules(self.conn)
+        return self.rules
+
+    def save_tenders(self, tenders):
+        """
+        Inserts a batch of tenders in one transaction and returns the ones that were
+        new. Bids another process saved first (work-queue workers share the DB) are
+        left out, so every bid is alerted exactly once. The Discord alerts of the new,
+        non-Ignored bids are queued in the same transaction: a saved bid always has
+        its alert waiting in pending_alerts.
+        A status already set on the tender (an excluded bid) wins; otherwise the
+        auto-triage rules pick the starting status (written back to t['status']).
+        """
+        if not tenders:
+            return []
+        found_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        for t in tenders:
+            t['status'] = t.get('status') or triage.match_status(t, self.rules) or "New"
+        rows = [
+            (
+                t['bid_no'], t['title'], t['items'], t['department'], t['start_date'], t['end_date'], t['link'], t['status'], found_at,
+                card_parser.to_iso(t['start_date']), card_parser.to_iso(t['end_date']),
+                t.get('matched_keywords', t['title']), t.get('score', 0)
+            )
+            for t in tenders
+        ]
+        with self.lock, self.conn:
+            # Write lock first, so no other worker can insert these bids between the check and the insert
+            self.conn.execute("BEGIN IMMEDIATE")
+            taken = set()
+            for i in range(0, len(rows), IN_CHUNK):
+                chunk = [row[0] for row in rows[i:i + IN_CHUNK]]
+                placeholders = ",".join("?" * len(chunk))
+                taken.update(row[0] for row in self.conn.execute(f"SELECT bid_no FROM tenders WHERE bid_no IN ({placeholders})", chunk))
+            self.conn.executemany('''
+                INSERT OR IGNORE INTO tenders
+                (bid_no, title, items, department, start_date, end_date, link, status, found_at, start_at, end_at, matched_keywords, score)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', [row for row in rows if row[0] not in taken])
+            alerts.queue_alerts(self.conn, [t for t in tenders if t['bid_no'] not in taken and t['status'] != "Ignored"])
+        self.seen.update(t['bid_no'] for t in tenders)
+        return [t for t in tenders if t['bid_no'] not in taken]
+
+    # --- CRAWL WATERMARKS ---
+    def get_watermarks(self):
+        """Returns {keyword: newest bid_no seen on the previous crawl}."""
+        with self.lock:
+            return dict(self.conn.execute("SELECT keyword, last_bid_no FROM crawl_watermarks").fetchall())
+
+    def get_behind(self):
+        """Keywords whose last crawl hit its page limit before reaching the watermark."""
+        with self.lock:
+            return {row[0] for row in self.conn.execute("SELECT keyword FROM crawl_watermarks WHERE behind = 1")}
+
+    def save_watermarks(self, watermarks, behind=()):
+        """Moves the watermarks (clearing their catch-up flag); `behind` keywords keep theirs and get flagged."""
+        updated_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO crawl_watermarks (keyword, last_bid_no, updated_at) VALUES (?, ?, ?)",
+                [(keyword, bid_no, updated_at) for keyword, bid_no in watermarks.items()]
+            )
+            self.conn.executemany(
+                "UPDATE crawl_watermarks SET behind = 1, updated_at = ? WHERE keyword = ?",
+                [(updated_at, keyword) for keyword in behind]
+            )
+
+    # --- KEYWORD SCHEDULE ---
+    def get_schedule(self):
+        """Returns {keyword: saved scheduler state as a dict}."""
+        with self.lock:
+            cursor = self.conn.execute(
+                "SELECT keyword, interval, next_due, new_rate, error_rate, failures, last_checked FROM keyword_schedule"
+            )
+            columns = [c[0] for c in cursor.description]
+            return {row[0]: dict(zip(columns, row)) for row in cursor.fetchall()}
+
+    def save_schedule(self, states):
+        with self.lock, self.conn:
+            self.conn.executemany('''
+                INSERT OR REPLACE INTO keyword_schedule (keyword, interval, next_due, new_rate, error_rate, failures, last_checked)
+                VALUES (:keyword, :interval, :next_due, :new_rate, :error_rate, :failures, :last_checked)
+            ''', states)
+
+    # --- CYCLE HISTORY ---
+    def record_cycle(self, cycle, backend, mode):
+        """Writes one finished cycle (metrics.finish_cycle output) to scrape_cycles."""
+        counts = cycle["counts"]
+        with self.lock, self.conn:
+            self.conn.execute('''
+                INSERT INTO scrape_cycles
+                (started_at, duration, backend, mode, cards_seen, cards_parsed, cards_failed, new_bids, alerts_queued, stages, error)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                cycle["started_at"], cycle["duration"], backend, mode,
+                counts.get("cards_seen", 0), counts.get("cards_parsed", 0), counts.get("cards_failed", 0),
+                counts.get("bids_new", 0), counts.get("alerts_queued", 0),
+                json.dumps({stage: round(seconds, 4) for stage, seconds in cycle["stages"].items()}), cycle["error"]
+            ))
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+_store = None
+
+def get_store():
+    """The process-wide TenderStore, opened on first use and closed at exit."""
+    global _store
+    if _store is None:
+        _store = TenderStore()
+        atexit.register(_store.close)
+    return _store
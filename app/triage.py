@@ -0,0 +1,48 @@
+from datetime import datetime
+
+# --- AUTO-TRIAGE RULES ---
+# A rule says "tenders whose <field> contains <pattern> get status <action>".
+# The scraper applies them at insert time; the dashboard manages them and can
+# apply a rule to tenders already in the Live tab.
+
+RULE_FIELDS = ("items", "department", "title")
+RULE_ACTIONS = ("Ignored", "Bookmarked")
+
+def load_rules(conn):
+    """All rules as dicts, oldest first."""
+    rows = conn.execute("SELECT id, field, pattern, action FROM triage_rules ORDER BY id").fetchall()
+    return [{"id": r[0], "field": r[1], "pattern": r[2], "action": r[3]} for r in rows]
+
+def match_status(tender, rules):
+    """Status the first matching rule assigns to a tender, or None (case-insensitive substring)."""
+    for rule in rules:
+        if rule["pattern"].lower() in (tender.get(rule["field"]) or "").lower():
+            return rule["action"]
+    return None
+
+def add_rule(conn, field, pattern, action):
+    if field not in RULE_FIELDS or action not in RULE_ACTIONS:
+        raise ValueError(f"Bad rule: {field} -> {action}")
+    pattern = pattern.strip()
+    if not pattern:
+        raise ValueError("Empty rule pattern")
+    with conn:
+        cursor = conn.execute(
+            "INSERT INTO triage_rules (field, pattern, action, created_at) VALUES (?, ?, ?, ?)",
+            (field, pattern, action, datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+        )
+    return cursor.lastrowid
+
+def delete_rule(conn, rule_id):
+    with conn:
+        conn.execute("DELETE FROM triage_rules WHERE id = ?", (rule_id,))
+
+def apply_rule(conn, rule):
+    """Applies one rule to every tender still marked New, in one statement. Returns rows changed."""
+    pattern = rule["pattern"].replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    with conn:
+        cursor = conn.execute(
+            f"UPDATE tenders SET status = ? WHERE status = 'New' AND {rule['field']} LIKE ? ESCAPE '\\'",
+            (rule["action"], f"%{pattern}%")
+        )
+    return cursor.rowcount
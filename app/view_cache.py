@@ -0,0 +1,184 @@
+import json
+import sqlite3
+import threading
+from datetime import datetime
+import pandas as pd
+import cold_tier
+import queries
+import triage
+
+# Which tab a status lives in (the Expired tab ignores status)
+TAB_FOR_STATUS = {status: tab for tab, status in queries.TAB_STATUS.items()}
+
+# Oldest cached views are dropped past this many (every distinct search/page is one view)
+MAX_VIEWS = 200
+
+# Expiry months covered by the history charts (older cold partitions are never opened)
+HISTORY_MONTHS = 12
+
+class ViewCache:
+    """
+    Dashboard query results shared by every Streamlit session, over one connection.
+    The whole cache is dropped when PRAGMA data_version moves (another process,
+    i.e. the scraper, committed). Status changes made here drop only the views of
+    the tabs they touch.
+    """
+
+    def __init__(self, db_file, cold_root=None):
+        self.conn = sqlite3.connect(db_file, check_same_thread=False)
+        self.cold = cold_tier.ColdTier(self.conn, cold_root)
+        self.lock = threading.RLock()
+        self.views = {}
+        self.stats = None
+        self.cycles = None
+        self.history = None
+        self.data_version = None
+
+    def _check_version(self):
+        # Only bumps for commits made by *other* connections, our own writes invalidate their tabs below
+        version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        if version != self.data_version:
+            self.views.clear()
+            self.stats = None
+            self.cycles = None
+            self.history = None
+            self.cold.clear()
+            self.data_version = version
+
+    # --- READS ---
+    def get_page(self, tab, search, page, page_size):
+        """(total, DataFrame) for one page of a tab, from cache when nothing has changed."""
+        key = (tab, search or "", page, page_size)
+        with self.lock:
+            self._check_version()
+            if key not in self.views:
+                if len(self.views) >= MAX_VIEWS:
+                    self.views.pop(next(iter(self.views)))
+                try:
+                    if tab == "Expired":
+                        total, df = self._expired_page(search, page, page_size)
+                    else:
+                        total = queries.count_tab(self.conn, tab, search)
+                        df = queries.fetch_tab(self.conn, tab, search, limit=page_size, offset=(page - 1) * page_size)
+                except Exception:
+                    # Not cached: a transient error (e.g. a locked database) is retried on the next read
+                    return 0, pd.DataFrame()
+                self.views[key] = [total, df]
+            return tuple(self.views[key])
+
+    def _expired_page(self, search, page, page_size):
+        """Expired rows still in SQLite (bookmarked, or not compacted yet) first, then the cold tier."""
+        offset = (page - 1) * page_size
+        hot_total = queries.count_tab(self.conn, "Expired", search)
+        frames = []
+        if offset < hot_total:
+            frames.append(queries.fetch_tab(self.conn, "Expired", search, limit=page_size, offset=offset))
+        room = page_size - sum(len(f) for f in frames)
+        if room > 0:
+            cold = self.cold.page(search, room, max(0, offset - hot_total))
+            if not cold.empty:
+                frames.append(cold.assign(tier="cold"))
+        df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+        return hot_total + self.cold.count(search), df
+
+    def get_scan_stats(self):
+        """(last scan time for display, tenders added in the last day)."""
+        with self.lock:
+            self._check_version()
+            if self.stats is None:
+                try:
+                    last_time = self.conn.execute("SELECT MAX(found_at) FROM tenders").fetchone()[0]
+                    recent_count = self.conn.execute("SELECT COUNT(*) FROM tenders WHERE found_at >= date('now', '-1 day')").fetchone()[0]
+                    display_time = "N/A"
+                    if last_time:
+                        display_time = datetime.strptime(last_time, '%Y-%m-%d %H:%M:%S').strftime('%d %b %H:%M')
+                    self.stats = (display_time, recent_count)
+                except Exception:
+                    return "Offline", 0
+            return self.stats
+
+    def get_cycle_history(self, limit=500):
+        """The most recent scrape cycles (newest first) with their per-stage seconds as columns."""
+        with self.lock:
+            self._check_version()
+            if self.cycles is None:
+                try:
+                    df = pd.read_sql("SELECT * FROM scrape_cycles ORDER BY id DESC LIMIT ?", self.conn, params=[limit])
+                    stages = pd.DataFrame([json.loads(s or "{}") for s in df["stages"]], index=df.index)
+                    self.cycles = df.drop(columns="stages").join(stages.add_prefix("stage_"))
+                except Exception:
+                    return pd.DataFrame()
+            return self.cycles
+
+    def get_history(self):
+        """
+        (tenders per expiry month, tenders per department) over the last HISTORY_MONTHS,
+        from SQLite plus the cold tier (only those months' files, only two columns).
+        """
+        with self.lock:
+            self._check_version()
+            if self.history is None:
+                since = (pd.Timestamp.now() - pd.DateOffset(months=HISTORY_MONTHS - 1)).strftime("%Y-%m")
+                try:
+                    hot = pd.read_sql(
+                        "SELECT end_at, department FROM tenders WHERE end_at >= ?", self.conn, params=[since]
+                    )
+                    paths = [p for _, month_paths, _ in self.cold.months(since) for p in month_paths]
+                    df = pd.concat([hot, self.cold.read(paths, ["end_at", "department"])], ignore_index=True)
+                except Exception:
+                    return pd.Series(dtype=int), pd.Series(dtype=int)
+                per_month = df["end_at"].str[:7].value_counts().sort_index()
+                per_department = df["department"].value_counts()
+                self.history = (per_month, per_department)
+            return self.history
+
+    def get_rules(self):
+        with self.lock:
+            return triage.load_rules(self.conn)
+
+    # --- WRITES ---
+    def _invalidate(self, *tabs):
+        """Drops every cached view of the given tabs; they reload on next read."""
+        for key in list(self.views):
+            if key[0] in tabs:
+                del self.views[key]
+
+    def update_status(self, bid_nos, new_status, from_tab):
+        """Writes the new status in one transaction and drops the cached views it affects."""
+        bid_nos = list(bid_nos)
+        if not bid_nos:
+            return
+        with self.lock:
+            self._check_version()
+            with self.conn:
+                self.conn.executemany("UPDATE tenders SET status = ? WHERE bid_no = ?", [(new_status, b) for b in bid_nos])
+            # Every page of both tabs shifts (totals, offsets, rows moving up), so reload them on next read
+            self._invalidate(from_tab, TAB_FOR_STATUS.get(new_status))
+
+    def update_matching(self, tab, search, new_status):
+        """Moves every row of a tab matching the search (all pages) in one UPDATE. Returns rows changed."""
+        with self.lock:
+            self._check_version()
+            _, from_where, _, params = queries.build_query(self.conn, tab, search)
+            with self.conn:
+                cursor = self.conn.execute(
+                    f"UPDATE tenders SET status = ? WHERE rowid IN (SELECT tenders.rowid {from_where})",
+                    [new_status] + params
+                )
+            self._invalidate(tab, TAB_FOR_STATUS.get(new_status))
+            return cursor.rowcount
+
+    def add_rule(self, field, pattern, action, apply_existing=False):
+        """Saves an auto-triage rule; optionally applies it to the Live tab right away. Returns rows changed."""
+        with self.lock:
+            self._check_version()
+            rule_id = triage.add_rule(self.conn, field, pattern, action)
+            if not apply_existing:
+                return 0
+            changed = triage.apply_rule(self.conn, {"id": rule_id, "field": field, "pattern": pattern.strip(), "action": action})
+            self._invalidate("Live", TAB_FOR_STATUS.get(action))
+            return changed
+
+    def delete_rule(self, rule_id):
+        with self.lock:
+            triage.delete_rule(self.conn, rule_id)
@@ -0,0 +1,235 @@
+import atexit
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+import config
+import metrics
+
+# --- WORK QUEUE ---
+# Work-queue mode splits scraping into (keyword, page) tasks that any number of worker
+# processes claim. A claim is a lease: the worker owns the task until lease_expires_at
+# and keeps pushing that back with heartbeats while it works. A worker that dies stops
+# heartbeating, its lease runs out and the next claim picks the task up again.
+# All pages of one keyword check share a round (the id of its page 1 task), which is
+# how the coordinator learns that a keyword's check has finished. Each page hands the
+# round's new watermark on to the next one; the last page saves it.
+
+@dataclass
+class Task:
+    id: int
+    round_id: int
+    keyword: str
+    page: int
+    backfill: bool
+    attempts: int  # Including this one
+    watermark: str = None  # Newest bid on the round's page 1 (set from page 2 on)
+
+class TaskQueue:
+    """
+    Backend interface. enqueue() must be idempotent per open (keyword, page) and
+    claim() atomic across processes; heartbeat/complete/fail only act while the
+    caller still holds the lease.
+    """
+    name = "base"
+
+    def enqueue(self, keyword, page=1, backfill=False, round_id=None):
+        """Queues one page (a new round when round_id is None). Returns its round id."""
+        raise NotImplementedError
+
+    def claim(self, owner):
+        """Leases the next due task to `owner`, or returns None when there is nothing to do."""
+        raise NotImplementedError
+
+    def heartbeat(self, task, owner):
+        """Extends the lease. Returns False if it was lost to another worker."""
+        raise NotImplementedError
+
+    def complete(self, task, owner, new_bids, next_page=None, watermark=None):
+        """
+        Marks the task done and queues the keyword's next page, if any, carrying `watermark`.
+        Returns False if the lease was lost.
+        """
+        raise NotImplementedError
+
+    def fail(self, task, owner, error):
+        """Puts the task back for a later retry, or gives up after QUEUE_MAX_ATTEMPTS."""
+        raise NotImplementedError
+
+    def round_outcomes(self, round_ids):
+        """{round_id: new bids, or None if a page failed} for the rounds with no open tasks left."""
+        raise NotImplementedError
+
+    def open_count(self):
+        """Tasks pending or leased."""
+        raise NotImplementedError
+
+    def prune(self, before):
+        """Forgets finished tasks older than `before` (epoch seconds)."""
+
+    def close(self):
+        pass
+
+    @contextmanager
+    def lease(self, task, owner):
+        """Heartbeats the task from a background thread while the with-block runs."""
+        done = threading.Event()
+
+        def beat():
+            while not done.wait(config.QUEUE_HEARTBEAT_INTERVAL):
+                if not self.heartbeat(task, owner):
+                    print(f"⚠️ Lost the lease on '{task.keyword}' page {task.page}")
+                    return
+
+        thread = threading.Thread(target=beat, name=f"heartbeat-{task.id}", daemon=True)
+        thread.start()
+        try:
+            yield task
+        finally:
+            done.set()
+            thread.join()
+
+class SqliteTaskQueue(TaskQueue):
+    """
+    Tasks in the crawl_tasks table of tenders.db. Claims run under SQLite's write
+    lock (BEGIN IMMEDIATE), so two workers can never lease the same task.
+    """
+    name = "sqlite"
+
+    def __init__(self, db_file=None):
+        self.conn = sqlite3.connect(db_file or config.DB_FILE, check_same_thread=False, timeout=30, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def _write(self):
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self.conn
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def _insert(self, conn, keyword, page, backfill, round_id, watermark=None):
+        now = time.time()
+        cursor = conn.execute(
+            "INSERT OR IGNORE INTO crawl_tasks (round_id, keyword, page, backfill, watermark, available_at, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (round_id, keyword, page, int(backfill), watermark, now, now)
+        )
+        if cursor.rowcount == 0:
+            # Already queued or being worked on: join that round instead
+            return conn.execute(
+                "SELECT round_id FROM crawl_tasks WHERE keyword = ? AND page = ? AND status IN ('pending', 'leased')",
+                (keyword, page)
+            ).fetchone()[0]
+        if round_id is None:
+            round_id = cursor.lastrowid
+            conn.execute("UPDATE crawl_tasks SET round_id = ? WHERE id = ?", (round_id, round_id))
+        return round_id
+
+    def enqueue(self, keyword, page=1, backfill=False, round_id=None):
+        with self._write() as conn:
+            return self._insert(conn, keyword, page, backfill, round_id)
+
+    def claim(self, owner):
+        now = time.time()
+        with self._write() as conn:
+            while True:
+                # Page 1 of every keyword first: that's where the new bids are
+                row = conn.execute('''
+                    SELECT id, round_id, keyword, page, backfill, attempts, status, watermark FROM crawl_tasks
+                    WHERE (status = 'pending' AND available_at <= ?) OR (status = 'leased' AND lease_expires_at < ?)
+                    ORDER BY page, id LIMIT 1
+                ''', (now, now)).fetchone()
+                if row is None:
+                    return None
+                task_id, round_id, keyword, page, backfill, attempts, status, watermark = row
+                if attempts >= config.QUEUE_MAX_ATTEMPTS:
+                    # Only reachable through expired leases: a task that keeps taking its worker down
+                    conn.execute(
+                        "UPDATE crawl_tasks SET status = 'failed', error = 'lease expired', finished_at = ? WHERE id = ?",
+                        (now, task_id)
+                    )
+                    continue
+                conn.execute(
+                    "UPDATE crawl_tasks SET status = 'leased', lease_owner = ?, lease_expires_at = ?, attempts = attempts + 1 WHERE id = ?",
+                    (owner, now + config.QUEUE_LEASE_SECONDS, task_id)
+                )
+                break
+        if status == "leased":
+            metrics.inc("tasks_reclaimed")
+            print(f"♻️ Reclaimed '{keyword}' page {page} from a worker whose lease expired")
+        return Task(task_id, round_id, keyword, page, bool(backfill), attempts + 1, watermark)
+
+    def heartbeat(self, task, owner):
+        with self.lock:
+            cursor = self.conn.execute(
+                "UPDATE crawl_tasks SET lease_expires_at = ? WHERE id = ? AND lease_owner = ? AND status = 'leased'",
+                (time.time() + config.QUEUE_LEASE_SECONDS, task.id, owner)
+            )
+        return cursor.rowcount == 1
+
+    def complete(self, task, owner, new_bids, next_page=None, watermark=None):
+        with self._write() as conn:
+            cursor = conn.execute(
+                "UPDATE crawl_tasks SET status = 'done', new_bids = ?, finished_at = ? WHERE id = ? AND lease_owner = ? AND status = 'leased'",
+                (new_bids, time.time(), task.id, owner)
+            )
+            if cursor.rowcount == 0:
+                return False
+            if next_page:
+                self._insert(conn, task.keyword, next_page, task.backfill, task.round_id, watermark)
+        return True
+
+    def fail(self, task, owner, error):
+        now = time.time()
+        retry = task.attempts < config.QUEUE_MAX_ATTEMPTS
+        with self.lock:
+            self.conn.execute('''
+                UPDATE crawl_tasks SET status = ?, error = ?, available_at = ?, lease_expires_at = NULL, finished_at = ?
+                WHERE id = ? AND lease_owner = ? AND status = 'leased'
+            ''', (
+                "pending" if retry else "failed", error,
+                now + config.QUEUE_RETRY_DELAY * 2 ** (task.attempts - 1), None if retry else now,
+                task.id, owner
+            ))
+
+    def round_outcomes(self, round_ids):
+        if not round_ids:
+            return {}
+        placeholders = ",".join("?" * len(round_ids))
+        with self.lock:
+            rows = self.conn.execute(f'''
+                SELECT round_id, SUM(status IN ('pending', 'leased')), SUM(status = 'failed'), SUM(COALESCE(new_bids, 0))
+                FROM crawl_tasks WHERE round_id IN ({placeholders}) GROUP BY round_id
+            ''', list(round_ids)).fetchall()
+        return {round_id: None if failed else new_bids for round_id, still_open, failed, new_bids in rows if not still_open}
+
+    def open_count(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM crawl_tasks WHERE status IN ('pending', 'leased')").fetchone()[0]
+
+    def prune(self, before):
+        with self.lock:
+            self.conn.execute("DELETE FROM crawl_tasks WHERE status IN ('done', 'failed') AND finished_at < ?", (before,))
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+_queue = None
+
+def get_queue(backend=None):
+    """The process-wide queue for config.QUEUE_BACKEND, closed at exit."""
+    global _queue
+    if _queue is None:
+        backend = backend or config.QUEUE_BACKEND
+        if backend == "sqlite":
+            _queue = SqliteTaskQueue()
+        else:
+            raise ValueError(f"Unknown QUEUE_BACKEND: {backend}")
+        atexit.register(_queue.close)
+    return _queue